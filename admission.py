@@ -0,0 +1,201 @@
+"""Admission control for the upstream services (Gemini and gTTS).
+
+Each upstream gets a limit on concurrent calls. Callers beyond the limit
+wait in a bounded queue, each for at most max_wait seconds or until its own
+deadline. A freed slot is handed to the longest waiting caller, a thread
+(woken through an Event) or an asyncio task (woken through its loop), so
+queued async callers hold no thread. When the queue is full, or the wait runs out, Overloaded is raised
+straight away. The routes turn that into a 503 with Retry-After instead of
+piling more calls onto a provider that is already rate limiting us.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+
+class Overloaded(Exception):
+    """An upstream has no free slot within the caller's wait limit"""
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f"{upstream} is busy, retry in {retry_after} s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Semaphore with a bounded wait queue and wait-time statistics"""
+
+    def __init__(self, name, max_concurrent=8, max_queue=32, max_wait=10.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._waiters = deque()  # [granted, wake] per queued caller, oldest first
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.longest_wait = 0.0
+        self.hold_seconds = 1.0  # moving average of how long a call holds its slot
+
+    def saturated(self):
+        """True when a new caller would be turned away immediately"""
+        with self._lock:
+            return self.active >= self.max_concurrent and self.waiting >= self.max_queue
+
+    def check(self):
+        """Raise Overloaded now if a new caller would be turned away"""
+        with self._lock:
+            if self.active >= self.max_concurrent and self.waiting >= self.max_queue:
+                self.rejected_full += 1
+                raise Overloaded(self.name, self.retry_after())
+
+    def retry_after(self):
+        # Caller holds the lock: time for the queue ahead to drain, in whole seconds
+        return max(1, math.ceil(self.hold_seconds * (self.waiting + 1) / self.max_concurrent))
+
+    def _try_acquire(self):
+        # Caller holds the lock: take a free slot, refuse if the queue is full,
+        # otherwise return False and let the caller queue
+        if self.active < self.max_concurrent and self.waiting == 0:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if self.waiting >= self.max_queue:
+            self.rejected_full += 1
+            raise Overloaded(self.name, self.retry_after())
+        return False
+
+    def try_acquire(self):
+        """Take a slot without waiting; False means the caller would have to queue"""
+        with self._lock:
+            return self._try_acquire()
+
+    def _give_up_at(self, deadline):
+        give_up = time.monotonic() + self.max_wait
+        return give_up if deadline is None else min(give_up, deadline)
+
+    def _enqueue(self, wake):
+        # Caller holds the lock
+        ticket = [False, wake]
+        self._waiters.append(ticket)
+        self.waiting += 1
+        return ticket
+
+    def _dequeue(self, ticket, started):
+        # Caller holds the lock: the waiter stops waiting, with a slot if granted
+        if not ticket[0]:
+            self._waiters.remove(ticket)
+        self.waiting -= 1
+        waited = time.monotonic() - started
+        self.queued += 1
+        self.total_wait += waited
+        self.longest_wait = max(self.longest_wait, waited)
+
+    def _grant(self):
+        # Caller holds the lock: hand free slots to the oldest waiters
+        while self._waiters and self.active < self.max_concurrent:
+            ticket = self._waiters.popleft()
+            try:
+                ticket[1]()
+            except RuntimeError:  # its event loop is closed; nobody to give it to
+                continue
+            ticket[0] = True
+            self.active += 1
+            self.admitted += 1
+
+    def _release(self, held):
+        # Caller holds the lock
+        self.active -= 1
+        if held is not None:
+            self.hold_seconds = 0.9 * self.hold_seconds + 0.1 * held
+        self._grant()
+
+    def acquire(self, deadline=None):
+        """Take a slot, waiting until max_wait or the time.monotonic() deadline"""
+        with self._lock:
+            if self._try_acquire():
+                return
+            woken = threading.Event()
+            ticket = self._enqueue(woken.set)
+        started = time.monotonic()
+        woken.wait(max(0.0, self._give_up_at(deadline) - started))
+        with self._lock:
+            self._dequeue(ticket, started)
+            if not ticket[0]:
+                self.rejected_timeout += 1
+                raise Overloaded(self.name, self.retry_after())
+
+    async def acquire_async(self, deadline=None):
+        """acquire() for the asyncio path: a queued caller awaits a future
+        that release() resolves on its loop, so no thread waits for it"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_acquire():
+                return
+            granted = loop.create_future()
+            ticket = self._enqueue(lambda: loop.call_soon_threadsafe(
+                lambda: granted.done() or granted.set_result(None)))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(granted, max(0.0, self._give_up_at(deadline) - started))
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                self._dequeue(ticket, started)
+                if ticket[0]:
+                    # Granted just as the caller went away; hand it on
+                    self._release(None)
+            raise
+        with self._lock:
+            self._dequeue(ticket, started)
+            if not ticket[0]:
+                self.rejected_timeout += 1
+                raise Overloaded(self.name, self.retry_after())
+
+    def release(self, held=None):
+        with self._lock:
+            self._release(held)
+
+    @contextmanager
+    def slot(self, deadline=None):
+        self.acquire(deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def slot_async(self, deadline=None):
+        """slot() for the asyncio path; waiting never blocks the loop or a thread"""
+        await self.acquire_async(deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active': self.active,
+                'max_concurrent': self.max_concurrent,
+                'queue_depth': self.waiting,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.rejected_full,
+                'rejected_wait_timeout': self.rejected_timeout,
+                'queued': self.queued,
+                'avg_queue_wait_ms': round(1000 * self.total_wait / self.queued, 1) if self.queued else 0.0,
+                'longest_wait_ms': round(1000 * self.longest_wait, 1),
+                'avg_hold_ms': round(1000 * self.hold_seconds, 1),
+            }
@@ -0,0 +1,198 @@
+"""Process-wide cache of answers to repeated questions.
+
+Most traffic is the same few questions (the suggestion phrases on the page),
+so the answer text and its encoded audio are kept in an LRU cache with a TTL.
+Keys combine the normalized question with a hash of the resume, so editing
+resume.txt invalidates every entry without an explicit flush.
+
+Spoken questions rarely repeat word for word, so SimilarityIndex also matches
+near-duplicates ("tell me about your masters" / "what was your MSc about")
+by cosine similarity of hashed n-gram vectors.
+"""
+import hashlib
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from retrieval import SYNONYMS, tokenize
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+WHITESPACE = re.compile(r"\s+")
+# "What tools do you use?" and "What tools don't you use?" share nearly every
+# feature but want opposite answers, so they are never matched to each other
+# Words that change how a question is put but not what it asks ("Ask me about my
+# projects" / "what projects have you done"). The resume is an AI engineer's,
+# so "AI" qualifies nearly everything in it ("your MSc in AI" / "your MSc").
+FILLER = {'ask', 'describe', 'did', 'done', 'explain', 'know', 'please', 'share', 'talk', 'ai'}
+NEGATION = re.compile(r"\b(?:not|never|cannot)\b|n['’]t\b", re.IGNORECASE)
+
+
+def is_negated(question):
+    return NEGATION.search(question) is not None
+
+
+def normalize_question(question):
+    """Lower-case, strip punctuation and quotes, collapse whitespace"""
+    question = PUNCTUATION.sub(' ', question.lower())
+    return WHITESPACE.sub(' ', question).strip()
+
+
+def make_key(question, content_hash):
+    """Cache key for a question asked against a given resume version"""
+    raw = f"{content_hash}\0{normalize_question(question)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class AnswerCache:
+    """Thread-safe LRU + TTL cache of (answer, audio) pairs"""
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, answer, audio)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return (answer, audio) for the key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, answer, audio = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return answer, audio
+
+    def put(self, key, answer, audio):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, answer, audio)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class SimilarityIndex:
+    """Bounded near-duplicate question index scored with one matrix product.
+
+    Each question becomes an L2-normalized vector of hashed word and character
+    trigram features; all stored questions live in one (capacity x dim) matrix
+    so a lookup is a single dot product against the query vector. When full,
+    the oldest slot is overwritten. A negated question only matches negated
+    ones, and a plain question only plain ones.
+    """
+
+    def __init__(self, capacity=512, dim=2048, threshold=0.85):
+        self.capacity = capacity
+        self.dim = dim
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._reset(None)
+        self.hits = 0
+        self.misses = 0
+        self.negation_misses = 0
+        self.rebuilds = 0
+
+    def _reset(self, content_hash):
+        self.content_hash = content_hash
+        self._vectors = np.zeros((self.capacity, self.dim), dtype=np.float32)
+        self._negated = np.zeros(self.capacity, dtype=bool)
+        self._entries = [None] * self.capacity  # slot -> (question, answer, audio)
+        self._size = 0
+        self._next = 0
+
+    def vectorize(self, question):
+        """Hashed word + character trigram vector, or None if nothing to match on"""
+        words = [SYNONYMS.get(word, word) for word in tokenize(question) if word not in FILLER]
+        if not words:
+            return None
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in words:
+            vector[zlib.crc32(f"w:{word}".encode('utf-8')) % self.dim] += 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                vector[zlib.crc32(padded[i:i + 3].encode('utf-8')) % self.dim] += 1.0
+        return vector / np.linalg.norm(vector)
+
+    def _check_version(self, content_hash):
+        # A new resume means every stored answer may be stale
+        if content_hash != self.content_hash:
+            if self.content_hash is not None:
+                self.rebuilds += 1
+            self._reset(content_hash)
+
+    def lookup(self, question, content_hash):
+        """Return (matched_question, answer, audio, score) or None"""
+        vector = self.vectorize(question)
+        with self._lock:
+            self._check_version(content_hash)
+            if vector is None or self._size == 0:
+                self.misses += 1
+                return None
+            scores = self._vectors[:self._size] @ vector
+            same_polarity = self._negated[:self._size] == is_negated(question)
+            if not same_polarity.all() and float(scores.max()) >= self.threshold:
+                scores = np.where(same_polarity, scores, -1.0)
+                if float(scores.max()) < self.threshold:
+                    self.negation_misses += 1
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            matched, answer, audio = self._entries[best]
+            return matched, answer, audio, score
+
+    def add(self, question, answer, audio, content_hash):
+        vector = self.vectorize(question)
+        if vector is None:
+            return
+        with self._lock:
+            self._check_version(content_hash)
+            slot = self._next
+            self._vectors[slot] = vector
+            self._negated[slot] = is_negated(question)
+            self._entries[slot] = (question, answer, audio)
+            self._next = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': self._size,
+                'capacity': self.capacity,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'negation_misses': self.negation_misses,
+                'rebuilds': self.rebuilds,
+            }
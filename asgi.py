@@ -0,0 +1,213 @@
+"""ASGI entry point: an asyncio serving path for the Q&A pipeline.
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+
+/ask and /ask/stream run natively on the event loop: Gemini is called
+through its async API and speech synthesis already runs on the TTS thread
+pool, so a request waiting on upstream services holds no thread and one
+process can carry many conversations at once. Session history is read
+and written on the default thread pool, since the SQLite store may wait on
+its lock. /audio/<id> waits for pending synthesis on the loop as well.
+Every other route (the page, the avatar model, /stats) is the unchanged
+Flask app, run on a small thread pool.
+"""
+import asyncio
+import json
+import os
+
+from a2wsgi import WSGIMiddleware
+
+import local_qa_server_works_somewhat_4 as server
+from admission import Overloaded
+from answer_cache import make_key
+from tts_cache import SentenceBuffer
+
+flask_app = WSGIMiddleware(server.app, workers=int(os.getenv('WSGI_THREADS', 16)))
+
+
+async def off_loop(func, *args):
+    """Run a call that touches the session store on a thread. With the SQLite
+    store it can wait on the database lock while another thread commits,
+    which would stall every request on this loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+async def read_json(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    try:
+        return json.loads(body or b'{}')
+    except ValueError:
+        return {}
+
+
+async def send_json(send, payload, status=200, headers=()):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+                    *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_overloaded(send, e):
+    await send_json(send, server.error_payload(e), 503, [(b'retry-after', str(e.retry_after).encode())])
+
+
+async def ask(scope, receive, send):
+    try:
+        data = await read_json(receive)
+        question = data.get('question', '')
+        session_id = data.get('session_id', 'default')
+
+        if not question:
+            return await send_json(send, {'error': 'No question provided'}, 400)
+
+        print(f"Question received (async): {question}")
+        deadline = server.Deadline(server.ASK_BUDGET)
+        summary, history = await off_loop(server.conversation_history.snapshot, session_id)
+        # Follow-ups depend on the conversation, so only first turns use the cache
+        is_first_turn = not history and not summary
+
+        resume_index = server.get_resume_index()
+        cache_key = make_key(question, resume_index.content_hash)
+        cached = server.lookup_cached_answer(question, cache_key, resume_index) if is_first_turn else None
+        if cached is not None:
+            return await send_json(send, await off_loop(server.answer_from_cache, session_id, question, cached))
+
+        if is_first_turn:
+            answer_text, is_first_turn = await server.answer_flights.do_async(
+                cache_key, server.generate_answer_async, question, history, resume_index, summary, deadline)
+        else:
+            answer_text = await server.generate_answer_async(question, history, resume_index, summary, deadline)
+        await send_json(send, await off_loop(
+            server.complete_answer, session_id, question, answer_text, cache_key, resume_index, is_first_turn,
+            deadline))
+
+    except Overloaded as e:
+        await send_overloaded(send, e)
+    except Exception as e:
+        await send_json(send, server.error_payload(e), 504 if server.is_timeout(e) else 500)
+
+
+async def ask_stream(scope, receive, send):
+    data = await read_json(receive)
+    question = data.get('question', '')
+    session_id = data.get('session_id', 'default')
+
+    if not question:
+        return await send_json(send, {'error': 'No question provided'}, 400)
+
+    print(f"Question received (async stream): {question}")
+    deadline = server.Deadline(server.ASK_BUDGET)
+    summary, history = await off_loop(server.conversation_history.snapshot, session_id)
+    is_first_turn = not history and not summary
+    resume_index = server.get_resume_index()
+    cache_key = make_key(question, resume_index.content_hash)
+    cached = server.lookup_cached_answer(question, cache_key, resume_index) if is_first_turn else None
+    try:
+        server.check_capacity(cached)
+    except Overloaded as e:
+        return await send_overloaded(send, e)
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+
+    async def emit(event):
+        await send({'type': 'http.response.body', 'body': event.encode('utf-8'), 'more_body': True})
+
+    try:
+        if cached is not None:
+            payload = await off_loop(server.answer_from_cache, session_id, question, cached)
+            await emit(server.sse_event('delta', {'text': payload['answer']}))
+            await emit(server.sse_event('done', payload))
+        else:
+            flights = server.answer_flights
+            flight, leader = flights.join(cache_key) if is_first_turn else (None, True)
+            if not leader:
+                answer_text = await asyncio.wrap_future(flight)
+                for event in await off_loop(server.replay_answer, session_id, question, answer_text):
+                    await emit(event)
+            else:
+                parts = []
+                sentences = SentenceBuffer()
+                segments = []
+                try:
+                    async for delta in server.stream_answer_async(question, history, resume_index, summary, deadline):
+                        parts.append(delta)
+                        await emit(server.sse_event('delta', {'text': delta}))
+                        for sentence in sentences.feed(delta):
+                            await emit(server.start_speech_segment(sentence, segments))
+                    for sentence in sentences.flush():
+                        await emit(server.start_speech_segment(sentence, segments))
+                except BaseException as e:
+                    if flight is not None:
+                        flights.resolve(cache_key, flight, error=e)
+                    raise
+                answer_text = ''.join(parts)
+                if flight is not None:
+                    flights.resolve(cache_key, flight, answer_text)
+
+                await emit(await off_loop(
+                    server.complete_streamed_answer, session_id, question, answer_text, segments, cache_key,
+                    resume_index, is_first_turn))
+    except Exception as e:
+        await emit(server.sse_event('error', server.error_payload(e)))
+
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def wait_for_audio(audio_id):
+    """Wait on the event loop for audio still being synthesized, so the
+    Flask /audio route finds it ready instead of blocking a thread"""
+    future = server.audio_store.pending(audio_id)
+    if future is None:
+        return
+    try:
+        await asyncio.wait_for(asyncio.wrap_future(future), timeout=server.AUDIO_WAIT_TIMEOUT)
+    except Exception:
+        pass  # the Flask route reports missing audio
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+ASYNC_ROUTES = {
+    ('POST', '/ask'): ask,
+    ('POST', '/ask/stream'): ask_stream,
+}
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    if scope['type'] == 'http':
+        handler = ASYNC_ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            return await handler(scope, receive, send)
+        if scope['path'].startswith('/audio/'):
+            await wait_for_audio(scope['path'][len('/audio/'):])
+
+    await flask_app(scope, receive, send)
@@ -0,0 +1,155 @@
+"""In-memory store of answer audio served as raw MP3 from /audio/<id>.
+
+/ask hands out an audio id instead of base64 audio inside the JSON, and the
+browser fetches the bytes separately. Synthesis can still be running when the
+id is handed out: the /audio route waits on the pending job. Ids are derived
+from the spoken text, so the same answer always maps to the same URL and the
+response can be cached by the browser.
+
+Under gunicorn with several workers the /audio request can reach a different
+process than the /ask that started synthesis. Finished audio is therefore
+also written to a spool directory shared by all workers (a TTSDiskCache), and
+an in-flight job leaves a marker file there so other workers know to wait.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class AudioStore:
+    """Bounded LRU of finished MP3s plus the synthesis jobs still in flight"""
+
+    def __init__(self, executor, max_bytes=64 * 1024 * 1024, spool=None):
+        self.executor = executor
+        self.max_bytes = max_bytes
+        self.spool = spool
+        self._audio = OrderedDict()  # audio_id -> MP3 bytes
+        self._pending = {}  # audio_id -> Future
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def put(self, audio_id, data):
+        with self._lock:
+            self._store(audio_id, data)
+        self._spool(audio_id, data)
+
+    def _store(self, audio_id, data):
+        # Caller holds the lock
+        previous = self._audio.pop(audio_id, None)
+        if previous is not None:
+            self.total_bytes -= len(previous)
+        self._audio[audio_id] = data
+        self.total_bytes += len(data)
+        while self.total_bytes > self.max_bytes and len(self._audio) > 1:
+            _, evicted = self._audio.popitem(last=False)
+            self.total_bytes -= len(evicted)
+            self.evictions += 1
+
+    def submit(self, audio_id, synthesize, *args):
+        """Start synthesize(*args) in the background unless the audio already
+        exists or is being made; returns a Future resolving to the MP3 bytes"""
+        with self._lock:
+            if audio_id in self._audio:
+                future = Future()
+                future.set_result(self._audio[audio_id])
+                return future
+            if audio_id in self._pending:
+                return self._pending[audio_id]
+            future = self.executor.submit(synthesize, *args)
+            self._pending[audio_id] = future
+        self._mark_pending(audio_id)
+        future.add_done_callback(lambda f: self._finish(audio_id, f))
+        return future
+
+    def _finish(self, audio_id, future):
+        data = None
+        with self._lock:
+            self._pending.pop(audio_id, None)
+            if not future.cancelled() and future.exception() is None and future.result():
+                data = future.result()
+                self._store(audio_id, data)
+        if data is not None:
+            self._spool(audio_id, data)
+        self._clear_pending(audio_id)
+
+    def _marker(self, audio_id):
+        return os.path.join(self.spool.directory, f"{audio_id}.pending")
+
+    def _mark_pending(self, audio_id):
+        if self.spool is None:
+            return
+        try:
+            with open(self._marker(audio_id), 'wb'):
+                pass
+        except OSError:
+            pass
+
+    def _clear_pending(self, audio_id):
+        if self.spool is None:
+            return
+        try:
+            os.remove(self._marker(audio_id))
+        except OSError:
+            pass
+
+    def _spool(self, audio_id, data):
+        if self.spool is None:
+            return
+        try:
+            self.spool.put(audio_id, data)
+        except OSError as e:
+            print(f"Could not spool audio {audio_id[:12]}: {e}")
+
+    def _from_spool(self, audio_id, timeout):
+        """Audio another worker finished or is still synthesizing, or None"""
+        if self.spool is None:
+            return None
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            data = self.spool.get(audio_id)
+            if data is not None:
+                return data
+            try:
+                # A marker older than the wait limit was left by a dead worker
+                age = time.time() - os.path.getmtime(self._marker(audio_id))
+            except OSError:
+                return None
+            if age > (timeout or 0) or time.monotonic() >= deadline:
+                return None
+            time.sleep(0.1)
+
+    def pending(self, audio_id):
+        """Future for audio still being synthesized, or None"""
+        with self._lock:
+            return self._pending.get(audio_id)
+
+    def get(self, audio_id, timeout=None):
+        """MP3 bytes for the id, waiting up to timeout seconds for a pending
+        job; None if the id is unknown or synthesis failed"""
+        with self._lock:
+            data = self._audio.get(audio_id)
+            if data is not None:
+                self._audio.move_to_end(audio_id)
+                return data
+            future = self._pending.get(audio_id)
+        if future is None:
+            return self._from_spool(audio_id, timeout)
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            print(f"Audio {audio_id[:12]} unavailable: {e}")
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._audio),
+                'pending': len(self._pending),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'spool': self.spool.stats() if self.spool is not None else None,
+            }
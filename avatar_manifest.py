@@ -0,0 +1,128 @@
+"""What the page needs to know about an avatar model, worked out once on the server.
+
+Without it the page searches every mesh's morph target names for each
+viseme, trying several spellings, and every bone name for the head, neck
+and spine, on each page load. The manifest has the answers, read from the
+GLB's JSON chunk (the geometry is never decoded):
+
+    {"meshes": {"Wolf3D_Head": {"visemes": {"A": 10, "B": 1, ...}, "blink": [15, 16]}, ...},
+     "bones": {"head": "Head", "neck": "Neck", "spine": "Spine"}}
+
+Meshes are keyed by node name, which three.js's GLTFLoader gives the mesh
+object; morph indices are positions in the mesh's targets, which is also
+their index in morphTargetInfluences.
+"""
+import json
+import os
+import struct
+import threading
+
+GLB_MAGIC = 0x46546C67
+JSON_CHUNK = 0x4E4F534A
+
+# The page's visemeMapping keys and the morph names that count for each,
+# preferred spelling first (the page's visemeNameVariations)
+VISEME_MORPHS = {
+    'sil': ('viseme_sil', 'viseme_silence'),
+    'A': ('viseme_aa', 'viseme_a'),
+    'B': ('viseme_PP', 'viseme_P', 'viseme_B'),
+    'C': ('viseme_CH', 'viseme_C'),
+    'D': ('viseme_DD', 'viseme_D'),
+    'E': ('viseme_E',),
+    'F': ('viseme_FF', 'viseme_F'),
+    'G': ('viseme_kk', 'viseme_K', 'viseme_G'),
+    'H': ('viseme_I',),
+    'X': ('viseme_nn', 'viseme_N'),
+    'O': ('viseme_O',),
+    'P': ('viseme_PP', 'viseme_P', 'viseme_B'),
+    'R': ('viseme_RR', 'viseme_R'),
+    'S': ('viseme_SS', 'viseme_S'),
+    'T': ('viseme_TH', 'viseme_T'),
+    'U': ('viseme_U',),
+}
+# Morphs updateEyeBlink() drives
+BLINK_MORPHS = ('eyeBlinkLeft', 'eyeBlinkRight', 'blink', 'eyeClose')
+# Bones the idle and speaking animations move; the first bone (in scene
+# order) whose name contains the word is used
+BONE_KEYWORDS = ('head', 'neck', 'spine')
+
+
+def read_gltf_json(path):
+    """The JSON chunk of a .glb file, without reading the binary chunk"""
+    with open(path, 'rb') as f:
+        magic, version, _ = struct.unpack('<III', f.read(12))
+        if magic != GLB_MAGIC or version != 2:
+            raise ValueError(f"{path} is not a binary glTF 2.0 file")
+        length, chunk_type = struct.unpack('<II', f.read(8))
+        if chunk_type != JSON_CHUNK:
+            raise ValueError(f"{path} does not start with a JSON chunk")
+        return json.loads(f.read(length))
+
+
+def scene_order(gltf):
+    """Node indices in the depth-first order three.js traverses the scene"""
+    nodes = gltf.get('nodes', [])
+    scene = gltf.get('scenes', [{}])[gltf.get('scene', 0)]
+    order = []
+    stack = list(reversed(scene.get('nodes', [])))
+    while stack:
+        index = stack.pop()
+        order.append(index)
+        stack.extend(reversed(nodes[index].get('children', [])))
+    return order
+
+
+def build_manifest(gltf):
+    """Manifest dict for a parsed glTF; see the module docstring"""
+    nodes = gltf.get('nodes', [])
+    order = scene_order(gltf)
+    meshes = {}
+    for index in order:
+        node = nodes[index]
+        if 'mesh' not in node:
+            continue
+        mesh = gltf['meshes'][node['mesh']]
+        names = mesh.get('extras', {}).get('targetNames', [])
+        if not names:
+            continue
+        by_name = {}
+        for position, name in enumerate(names):
+            by_name.setdefault(name.lower(), position)
+        visemes = {}
+        for viseme, spellings in VISEME_MORPHS.items():
+            for spelling in spellings:
+                if spelling.lower() in by_name:
+                    visemes[viseme] = by_name[spelling.lower()]
+                    break
+        meshes[node.get('name') or mesh.get('name', f"mesh{node['mesh']}")] = {
+            'visemes': visemes,
+            'blink': [by_name[name.lower()] for name in BLINK_MORPHS if name.lower() in by_name],
+        }
+    joints = {joint for skin in gltf.get('skins', []) for joint in skin['joints']}
+    bones = {}
+    for index in order:
+        name = nodes[index].get('name', '')
+        for keyword in BONE_KEYWORDS:
+            if index in joints and keyword not in bones and keyword in name.lower():
+                bones[keyword] = name
+                break
+    return {'meshes': meshes, 'bones': bones}
+
+
+class ManifestCache:
+    """Manifests by model path, rebuilt when the file changes"""
+
+    def __init__(self):
+        self._manifests = {}  # path -> (mtime_ns, size, manifest)
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """(manifest, version tag) for the model at path; raises OSError if missing"""
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._manifests.get(path)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            cached = (stat.st_mtime_ns, stat.st_size, build_manifest(read_gltf_json(path)))
+            with self._lock:
+                self._manifests[path] = cached
+        return cached[2], f"{cached[0]:x}-{cached[1]:x}"
@@ -0,0 +1,208 @@
+"""Load test for comparing gunicorn worker modes (see gunicorn.conf.py).
+
+    python benchmark.py --compare
+    python benchmark.py --url http://localhost:8000 --concurrency 32
+
+--compare starts gunicorn once per GUNICORN_MODE with Gemini and gTTS
+replaced by stand-ins that only sleep (BENCH_LLM_SECONDS per answer,
+BENCH_TTS_SECONDS per sentence), so the numbers measure how many slow
+upstream calls each mode keeps in flight rather than network noise or API
+quota. Without --compare it drives an already running server; that server
+then calls the real APIs.
+
+Every request asks a question never asked before and then fetches its audio,
+so the answer, similarity and TTS caches never short-circuit the work.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+LLM_SECONDS = float(os.getenv('BENCH_LLM_SECONDS', 1.5))
+TTS_SECONDS = float(os.getenv('BENCH_TTS_SECONDS', 0.3))
+
+
+class SimulatedResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def __iter__(self):
+        for sentence in self.text.split('. '):
+            yield SimulatedResponse(sentence + '. ')
+
+    async def __aiter__(self):
+        for chunk in self:
+            yield chunk
+
+
+class SimulatedModel:
+    """Stands in for genai.GenerativeModel; answers after LLM_SECONDS"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @staticmethod
+    def _answer(prompt):
+        nonce = uuid.uuid4().hex[:8]
+        return f"This is simulated answer {nonce}. It has a second sentence {nonce}."
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        time.sleep(LLM_SECONDS)
+        return SimulatedResponse(self._answer(prompt))
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        await asyncio.sleep(LLM_SECONDS)
+        return SimulatedResponse(self._answer(prompt))
+
+
+class SimulatedTTS:
+    """Stands in for gTTS; writes a dummy MP3 after TTS_SECONDS"""
+
+    def __init__(self, text, **kwargs):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        time.sleep(TTS_SECONDS)
+        fp.write(b'\xff\xfb' + self.text.encode('utf-8'))
+
+
+def install_simulated_upstreams():
+    import local_qa_server_works_somewhat_4 as server
+    import tts_backends
+    server.genai.GenerativeModel = SimulatedModel
+    tts_backends.gTTS = SimulatedTTS
+    return server
+
+
+def simulated_wsgi_app():
+    """gunicorn app factory: the Flask app with simulated upstreams"""
+    return install_simulated_upstreams().app
+
+
+def simulated_asgi_app():
+    """gunicorn app factory: the ASGI app with simulated upstreams"""
+    install_simulated_upstreams()
+    import asgi
+    return asgi.app
+
+
+def ask_once(url, index):
+    """POST a fresh question and fetch its audio; returns (answer seconds, total seconds)"""
+    question = f"Benchmark question {index} {uuid.uuid4().hex}?"
+    body = json.dumps({'question': question, 'session_id': uuid.uuid4().hex}).encode('utf-8')
+    started = time.perf_counter()
+    req = urllib.request.Request(f"{url}/ask", data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=300) as resp:
+        result = json.loads(resp.read())
+    answered = time.perf_counter()
+    if result.get('audio_url'):
+        with urllib.request.urlopen(f"{url}{result['audio_url']}", timeout=300) as resp:
+            resp.read()
+    return answered - started, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_load(url, concurrency, requests):
+    """Fire requests from concurrency client threads; return a summary dict"""
+    answer_times, total_times, errors = [], [], 0
+    lock = threading.Lock()
+
+    def one(index):
+        nonlocal errors
+        try:
+            answer_s, total_s = ask_once(url, index)
+        except Exception as e:
+            print(f"Request {index} failed: {e}", file=sys.stderr)
+            with lock:
+                errors += 1
+            return
+        with lock:
+            answer_times.append(answer_s)
+            total_times.append(total_s)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    summary = {'requests': requests, 'errors': errors, 'seconds': round(elapsed, 2),
+               'throughput_rps': round(len(total_times) / elapsed, 2)}
+    if total_times:
+        summary.update({
+            'answer_p50_s': round(statistics.median(answer_times), 2),
+            'answer_p95_s': round(percentile(answer_times, 95), 2),
+            'total_p50_s': round(statistics.median(total_times), 2),
+            'total_p95_s': round(percentile(total_times, 95), 2),
+        })
+    return summary
+
+
+def wait_until_up(url, deadline):
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/stats", timeout=2):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def compare(modes, port, workers, concurrency, requests):
+    url = f"http://127.0.0.1:{port}"
+    results = {}
+    for mode in modes:
+        factory = 'simulated_asgi_app()' if mode == 'async' else 'simulated_wsgi_app()'
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = dict(os.environ, GUNICORN_MODE=mode, PORT=str(port), WEB_CONCURRENCY=str(workers),
+                       WARMUP='0', TTS_CACHE_DIR=cache_dir, SEMANTIC_MATCH_THRESHOLD='2',
+                       SESSION_DB_PATH=os.path.join(cache_dir, 'sessions.sqlite3'))
+            server = subprocess.Popen(
+                ['gunicorn', '-c', 'gunicorn.conf.py', f"benchmark:{factory}"],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                if not wait_until_up(url, time.monotonic() + 30):
+                    raise RuntimeError(f"gunicorn did not start in {mode} mode")
+                print(f"Running {mode} mode...", file=sys.stderr)
+                results[mode] = run_load(url, concurrency, requests)
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+    return results
+
+
+def print_table(results):
+    columns = ['throughput_rps', 'answer_p50_s', 'answer_p95_s', 'total_p50_s', 'total_p95_s', 'errors']
+    print('| mode | ' + ' | '.join(columns) + ' |')
+    print('|---' * (len(columns) + 1) + '|')
+    for mode, summary in results.items():
+        print(f"| {mode} | " + ' | '.join(str(summary.get(c, '-')) for c in columns) + ' |')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=128)
+    parser.add_argument('--compare', action='store_true', help='start gunicorn in each mode with simulated upstreams')
+    parser.add_argument('--modes', default='sync,thread,async')
+    parser.add_argument('--workers', type=int, default=2, help='WEB_CONCURRENCY for --compare')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.compare:
+        print_table(compare(args.modes.split(','), args.port, args.workers, args.concurrency, args.requests))
+    else:
+        print(json.dumps(run_load(args.url.rstrip('/'), args.concurrency, args.requests), indent=2))
@@ -0,0 +1,98 @@
+"""Latency budgets, retries and a record of how each request was served.
+
+Every /ask carries a Deadline for its whole pipeline. Upstream calls take
+their timeout from what is left of it. Failed calls are retried with
+jittered exponential backoff, but only while the backoff still fits in the
+budget, so a retry never pushes a request past its deadline. PathCounter
+counts which path each answer took (full, cached, audio delivered late,
+text only, ...) for /stats.
+"""
+import asyncio
+import random
+import threading
+import time
+
+
+class DeadlineExceeded(Exception):
+    """The request's latency budget ran out"""
+
+
+class Deadline:
+    """A point in time.monotonic() a request must finish by"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.at = time.monotonic() + budget
+
+    def remaining(self):
+        return max(0.0, self.at - time.monotonic())
+
+    def timeout(self, cap=None):
+        """Seconds an upstream call may take, optionally capped; raises if none are left"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"latency budget of {self.budget:g} s used up")
+        return min(remaining, cap) if cap else remaining
+
+
+def backoff_delays(attempts, base_delay, max_delay):
+    """Full-jitter exponential backoff: a random delay in [0, base * 2^n]"""
+    for attempt in range(attempts - 1):
+        yield random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def next_retry_delay(delays, error, deadline, should_retry):
+    """Seconds to back off before trying again, or None if error should be
+    raised: it isn't retryable, attempts are used up, or the wait would not
+    leave time before the deadline"""
+    delay = next(delays, None)
+    if delay is None or not should_retry(error) or delay >= deadline.remaining():
+        return None
+    return delay
+
+
+def retry_call(fn, deadline, should_retry, attempts=3, base_delay=0.25, max_delay=2.0, on_retry=None):
+    """fn() with retries on errors should_retry() accepts, within the deadline"""
+    delays = backoff_delays(attempts, base_delay, max_delay)
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            delay = next_retry_delay(delays, e, deadline, should_retry)
+            if delay is None:
+                raise
+            if on_retry is not None:
+                on_retry(e)
+            time.sleep(delay)
+
+
+async def retry_call_async(fn, deadline, should_retry, attempts=3, base_delay=0.25, max_delay=2.0,
+                           on_retry=None):
+    """retry_call() for a coroutine function"""
+    delays = backoff_delays(attempts, base_delay, max_delay)
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            delay = next_retry_delay(delays, e, deadline, should_retry)
+            if delay is None:
+                raise
+            if on_retry is not None:
+                on_retry(e)
+            await asyncio.sleep(delay)
+
+
+class PathCounter:
+    """Thread-safe counts of the path each request took"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, path):
+        with self._lock:
+            self._counts[path] = self._counts.get(path, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
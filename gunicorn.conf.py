@@ -0,0 +1,95 @@
+"""Gunicorn settings, picked up automatically from the working directory.
+
+    gunicorn -c gunicorn.conf.py
+
+Every /ask spends seconds waiting on Gemini and gTTS and almost no time on
+the CPU, so the worker model matters more than the worker count.
+GUNICORN_MODE picks it:
+
+  thread (default)  gthread workers; each worker serves GUNICORN_THREADS
+                    requests at once with plain blocking calls
+  async             uvicorn workers running asgi:app; /ask runs on an event
+                    loop, so one worker holds many in-flight LLM calls
+  sync              the old behaviour, one request per worker
+
+Worker counts come from the CPU count, capped by the memory actually
+available (about WORKER_MEMORY_MB per worker). WEB_CONCURRENCY and
+GUNICORN_THREADS override the computed values. See the benchmark section of
+DEPLOYMENT_GUIDE.md (produced with benchmark.py) for how the modes compare.
+"""
+import os
+
+MODES = {
+    'thread': ('gthread', 'local_qa_server_works_somewhat_4:app'),
+    'async': ('uvicorn.workers.UvicornWorker', 'asgi:app'),
+    'sync': ('sync', 'local_qa_server_works_somewhat_4:app'),
+}
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo, or None where that isn't readable"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def default_workers(mode, cpus, memory_mb, worker_memory_mb):
+    if mode == 'sync':
+        workers = 2 * cpus + 1
+    else:
+        # Threads or the event loop provide the concurrency; one worker per
+        # core is enough to use the CPU for JSON, hashing and numpy scoring
+        workers = cpus
+    if memory_mb is not None:
+        # Leave a quarter of memory for the OS and page cache
+        workers = min(workers, int(memory_mb * 0.75) // worker_memory_mb)
+    return max(1, workers)
+
+
+mode = os.getenv('GUNICORN_MODE', 'thread')
+if mode not in MODES:
+    raise RuntimeError(f"GUNICORN_MODE must be one of {', '.join(MODES)}, not {mode!r}")
+worker_class, wsgi_app = MODES[mode]
+
+cpus = os.cpu_count() or 1
+memory_mb = available_memory_mb()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY') or default_workers(
+    mode, cpus, memory_mb, int(os.getenv('WORKER_MEMORY_MB', 150))))
+threads = int(os.getenv('GUNICORN_THREADS', 16)) if mode == 'thread' else 1
+
+# Import the app once in the master and fork workers from it, so the code,
+# numpy and the resume index are shared copy-on-write
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+# Gemini plus synthesis can take well over gunicorn's default 30 s on a slow
+# upstream; a streamed answer also keeps its connection open while speaking
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Session history must be visible to whichever worker gets the follow-up
+if workers > 1:
+    os.environ.setdefault('SESSION_BACKEND', 'sqlite')
+
+# Warm-up calls Gemini, which must not happen in the master before the fork
+# (with preload_app); each worker starts its own warm-up in post_fork instead,
+# whether or not it imports the app there
+os.environ.setdefault('WARMUP_DEFERRED', '1')
+
+
+def post_fork(server, worker):
+    import local_qa_server_works_somewhat_4 as app_module
+    app_module.start_warm_up()
+
+
+def when_ready(server):
+    server.log.info(
+        "Mode %s: %d %s worker(s) x %d thread(s), %s MB available, timeout %ds",
+        mode, workers, worker_class, threads, memory_mb if memory_mb is not None else '?', timeout)
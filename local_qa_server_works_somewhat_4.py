@@ -1,16 +1,157 @@
-from flask import Flask, render_template_string, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template_string, request, jsonify, stream_with_context
 import google.generativeai as genai
 import os
-from gtts import gTTS
-import base64
-from io import BytesIO
+from gtts import gTTSError
+from google.api_core import exceptions as google_exceptions
+import asyncio
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from retrieval import ResumeIndex
+from answer_cache import AnswerCache, SimilarityIndex, make_key
+from tts_cache import SentenceBuffer, TTSDiskCache, split_sentences
+from tts_backends import make_backend
+from visemes import SpeechRate, timeline
+from audio_store import AudioStore
+from avatar_manifest import ManifestCache
+from static_assets import IMMUTABLE_MAX_AGE, BuiltAssets, StaticAssets
+from vendor_bundle import build_bundle, problems as vendor_problems
+from sessions import HistoryWindow, SessionStore, SQLiteSessionStore
+from singleflight import SingleFlight
+from admission import AdmissionController, Overloaded
+from deadlines import (Deadline, DeadlineExceeded, PathCounter, backoff_delays, next_retry_delay,
+                       retry_call, retry_call_async)
 
 app = Flask(__name__)
 
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 genai.configure(api_key=GEMINI_API_KEY)
-conversation_history = {}  # session_id -> list of (question, answer)
+# session_id -> rolling summary + recent (question, answer) turns, bounded and evicting
+session_limits = dict(
+    max_sessions=int(os.getenv('MAX_SESSIONS', 1000)),
+    idle_ttl=int(os.getenv('SESSION_IDLE_TTL', 1800)),
+    max_bytes=int(os.getenv('SESSION_STORE_MAX_MB', 16)) * 1024 * 1024,
+    window=HistoryWindow(
+        max_turns=int(os.getenv('MAX_TURNS_PER_SESSION', 6)),
+        token_budget=int(os.getenv('HISTORY_TOKEN_BUDGET', 1000)),
+        summary_token_budget=int(os.getenv('SUMMARY_TOKEN_BUDGET', 300)),
+    ),
+)
+# 'memory' keeps sessions in this process; 'sqlite' shares them between workers
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'memory')
+if SESSION_BACKEND == 'sqlite':
+    conversation_history = SQLiteSessionStore(
+        os.getenv('SESSION_DB_PATH', '.sessions.sqlite3'),
+        flush_interval=float(os.getenv('SESSION_FLUSH_INTERVAL', 0.1)),
+        **session_limits,
+    )
+elif SESSION_BACKEND == 'memory':
+    conversation_history = SessionStore(**session_limits)
+else:
+    raise RuntimeError(f"SESSION_BACKEND must be 'memory' or 'sqlite', not {SESSION_BACKEND!r}")
+
+RESUME_PATH = 'resume.txt'
+# 3D models, served from /model/ under content-hashed URLs; nothing outside MODEL_DIR is reachable
+model_assets = StaticAssets(
+    os.getenv('MODEL_DIR', 'models'),
+    url_prefix='/model',
+    extensions=('.glb', '.gltf', '.bin', '.png', '.jpg', '.jpeg', '.webp', '.ktx2'),
+)
+# Model the page loads; the optimized build (optimize_avatar.py) when there is one
+AVATAR_MODEL = os.getenv('AVATAR_MODEL') or ('avatar.min.glb' if model_assets.path('avatar.min.glb') else 'avatar.glb')
+# Viseme morph indices and bone names per model, served next to it
+avatar_manifests = ManifestCache()
+if model_assets.path(AVATAR_MODEL):
+    model_assets.precompress(AVATAR_MODEL)
+    avatar_manifests.get(model_assets.path(AVATAR_MODEL))
+# three.js, GLTFLoader and wawa-lipsync (vendor_bundle.py), served as one bundle
+VENDOR_DIR = os.getenv('VENDOR_DIR', 'vendor')
+RAG_TOP_K = int(os.getenv('RAG_TOP_K', 4))
+RAG_MIN_SCORE = float(os.getenv('RAG_MIN_SCORE', 3.0))
+_resume_index = None
+_resume_index_lock = threading.Lock()
+
+# Answers (text + audio) for repeated questions, keyed by question and resume hash
+answer_cache = AnswerCache(
+    max_entries=int(os.getenv('ANSWER_CACHE_SIZE', 256)),
+    ttl=int(os.getenv('ANSWER_CACHE_TTL', 3600)),
+)
+# Near-duplicate matching for spoken variations of already answered questions
+similar_questions = SimilarityIndex(
+    capacity=int(os.getenv('SEMANTIC_INDEX_SIZE', 512)),
+    threshold=float(os.getenv('SEMANTIC_MATCH_THRESHOLD', 0.85)),
+)
+# Concurrent first-turn requests for the same question share one Gemini call
+answer_flights = SingleFlight(linger=float(os.getenv('SINGLEFLIGHT_LINGER', 10)))
+
+# Speech engine: 'gtts' (Google, MP3) or 'espeak' (local and offline, WAV)
+TTS_LANG = 'en'
+tts_backend = make_backend(os.getenv('TTS_BACKEND', 'gtts'), lang=TTS_LANG, voice=os.getenv('TTS_VOICE'))
+TTS_VOICE = tts_backend.cache_voice  # part of every cache key and audio id
+# Sentence-level audio cache on disk, shared across restarts
+tts_cache = TTSDiskCache(
+    directory=os.getenv('TTS_CACHE_DIR', '.tts_cache'),
+    max_bytes=int(os.getenv('TTS_CACHE_MAX_MB', 100)) * 1024 * 1024,
+    extension=tts_backend.extension,
+)
+# Sentences of a streamed answer are synthesized concurrently on this pool
+tts_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('TTS_WORKERS', 4)),
+    thread_name_prefix='tts',
+)
+# Finished and in-flight answer audio, fetched by the page from /audio/<id>
+audio_store = AudioStore(
+    tts_executor,
+    max_bytes=int(os.getenv('AUDIO_STORE_MAX_MB', 64)) * 1024 * 1024,
+    # Shared by all gunicorn workers on the host, so any of them can serve /audio
+    spool=TTSDiskCache(
+        directory=os.getenv('AUDIO_SPOOL_DIR', os.path.join(tts_cache.directory, 'answers')),
+        max_bytes=int(os.getenv('AUDIO_SPOOL_MAX_MB', 64)) * 1024 * 1024,
+        extension=tts_backend.extension,
+    ),
+)
+AUDIO_WAIT_TIMEOUT = float(os.getenv('AUDIO_WAIT_TIMEOUT', 30))
+# Speaking rate for timing viseme tracks of audio that isn't synthesized yet
+speech_rate = SpeechRate()
+
+# Bounds on concurrent upstream calls; callers that would queue too long are
+# turned away with a 503 instead of tripping the providers' rate limits
+gemini_limit = AdmissionController(
+    'Gemini',
+    max_concurrent=int(os.getenv('GEMINI_MAX_CONCURRENT', 8)),
+    max_queue=int(os.getenv('GEMINI_MAX_QUEUE', 32)),
+    max_wait=float(os.getenv('GEMINI_QUEUE_TIMEOUT', 10)),
+)
+tts_limit = AdmissionController(
+    tts_backend.name,
+    max_concurrent=int(os.getenv('TTS_MAX_CONCURRENT', 4)),
+    max_queue=int(os.getenv('TTS_MAX_QUEUE', 64)),
+    max_wait=float(os.getenv('TTS_QUEUE_TIMEOUT', 20)),
+)
+BUSY_MESSAGE = "I'm answering a lot of questions right now. Please ask again in a few seconds."
+
+# End-to-end latency budget of an answer; Gemini calls take their timeout
+# from what is left of it and are retried only while a retry still fits.
+# Speech gets AUDIO_WAIT_TIMEOUT from when synthesis is requested.
+ASK_BUDGET = float(os.getenv('ASK_BUDGET', 20))
+UPSTREAM_ATTEMPTS = int(os.getenv('UPSTREAM_ATTEMPTS', 3))
+pipeline_paths = PathCounter()  # how each answer was served
+upstream_retries = PathCounter()  # retries per upstream
+
+# Suggestion lines shown on the page; also the default warm-up questions
+SUGGESTIONS_RIGHT = [
+    "Tell me about your MSc in AI.",
+    "What AI tools do you use most?",
+    "What are your publications?",
+]
+SUGGESTIONS_LEFT = [
+    "Ask me about my experience",
+    "Ask me about my projects",
+    "Ask me about my research",
+]
 
 # Read the text file
 def read_context_file(filepath='resume.txt'):
@@ -20,23 +161,356 @@ def read_context_file(filepath='resume.txt'):
     except FileNotFoundError:
         return "Context file not found."
 
-def text_to_speech(text):
-    """Convert text to speech and return base64 encoded audio"""
+def get_resume_index(filepath=RESUME_PATH):
+    """Return the section index for the resume, rebuilding it when the file changes"""
+    global _resume_index
+    try:
+        mtime = os.path.getmtime(filepath)
+    except OSError:
+        mtime = None
+    with _resume_index_lock:
+        if _resume_index is None or _resume_index.mtime != mtime:
+            _resume_index = ResumeIndex(read_context_file(filepath), mtime=mtime)
+            print(f"Indexed {len(_resume_index.sections)} resume sections")
+        return _resume_index
+
+def is_transient(e):
+    """Upstream errors worth retrying: rate limits, timeouts, provider outages"""
+    if isinstance(e, gTTSError):
+        status = getattr(e.rsp, 'status_code', None)
+        return status is None or status == 429 or status >= 500
+    return isinstance(e, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.InternalServerError,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.GatewayTimeout,
+        google_exceptions.DeadlineExceeded,
+        ConnectionError,
+        TimeoutError,
+    ))
+
+def retry_logger(upstream):
+    def log_retry(e):
+        upstream_retries.record(upstream)
+        print(f"Retrying {upstream} after: {e}")
+    return log_retry
+
+def synthesize_sentence(sentence, deadline=None):
+    """Run the TTS backend on one sentence and return the audio bytes"""
+    deadline = deadline or Deadline(AUDIO_WAIT_TIMEOUT)
+
+    def attempt():
+        with tts_limit.slot(deadline.at):
+            return tts_backend.synthesize(sentence, deadline.timeout())
+
+    return retry_call(attempt, deadline, is_transient, attempts=UPSTREAM_ATTEMPTS,
+                      on_retry=retry_logger(tts_backend.name))
+
+def synthesize_segment(sentence, deadline=None):
+    """Audio bytes for one sentence of a streamed answer (cached on disk)"""
+    return tts_cache.synthesize_one(sentence, lambda s: synthesize_sentence(s, deadline),
+                                    lang=TTS_LANG, voice=TTS_VOICE)
+
+def text_to_speech(text, deadline=None):
+    """Convert text to speech and return the audio bytes"""
+    deadline = deadline or Deadline(AUDIO_WAIT_TIMEOUT)
     try:
-        tts = gTTS(text=text, lang='en', slow=False)
-        fp = BytesIO()
-        tts.write_to_fp(fp)
-        fp.seek(0)
-        audio_base64 = base64.b64encode(fp.read()).decode('utf-8')
-        return audio_base64
+        return tts_cache.synthesize(text, lambda s: synthesize_sentence(s, deadline),
+                                    lang=TTS_LANG, voice=TTS_VOICE, join=tts_backend.join)
     except Exception as e:
         print(f"Error in text-to-speech: {e}")
         return None
 
+def estimated_synthesis_seconds(text):
+    """Rough time to speak text: recent TTS call time for every sentence
+    not on disk yet (text_to_speech() synthesizes them one after another)"""
+    uncached = sum(1 for sentence in split_sentences(text)
+                   if not tts_cache.contains(tts_cache.key(sentence, TTS_LANG, TTS_VOICE)))
+    return uncached * tts_limit.stats()['avg_hold_ms'] / 1000
+
+def speech_id(text):
+    """Audio id for spoken text; the same text always gets the same id"""
+    return tts_cache.key(text, TTS_LANG, TTS_VOICE)
+
+def publish_audio(text, audio):
+    """Make already synthesized audio available under /audio/<id>"""
+    audio_id = speech_id(text)
+    audio_store.put(audio_id, audio)
+    return audio_id
+
+def viseme_track(text, audio=None):
+    """Lip-sync timeline for spoken text, timed to its audio if that is
+    synthesized already and to the estimated length otherwise (the page
+    stretches the track to the real length once the audio has loaded)"""
+    duration = tts_backend.duration_ms(audio) if audio else 0
+    if duration > 0:
+        speech_rate.observe(text, duration)
+        return timeline(text, duration)
+    return timeline(text, speech_rate.estimate_ms(text))
+
+def learn_speech_rate(text):
+    """Done callback for a synthesis future: refine the speaking rate from the clip"""
+    def clip_done(future):
+        if future.exception() is None and future.result():
+            speech_rate.observe(text, tts_backend.duration_ms(future.result()))
+    return clip_done
+
+def when_all_synthesized(futures, callback):
+    """Call callback(joined audio bytes) once every segment future has
+    succeeded; skipped if any segment failed"""
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def segment_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        if all(f.exception() is None and f.result() for f in futures):
+            callback(tts_backend.join([f.result() for f in futures]))
+
+    for future in futures:
+        future.add_done_callback(segment_done)
+
+# Fixed persona rules, sent once as the model's system instruction
+SYSTEM_INSTRUCTION = """
+You are assisting the user by answering questions using the provided resume documents only.
+
+Respond in first person ("I", "my experience", "my background") as if you are the owner of the resume.
+In case asked about 'tell me about this portfolio.', refer to 'QandA System by Text Extraction from PDF' in projects and phrase it accordingly.
+Do NOT invent personal information that is not in the retrieved documents.
+If the answer is not found or looks closer to an information you have, first ask a follow up question to clarify, otherwise respond with:
+"That information isn't in my resume. Would you like to know anything else?"
+
+Tone: concise, professional, confident, clear.
+"""
+
+# Per-request part of the prompt; only history, context and question vary
+PROMPT_TEMPLATE = """Conversation history:
+{history_text}
+
+RAG Context:
+{context}
+
+User question: {question}
+
+Answer:"""
+
+# With RAG_TOP_K=0 the whole resume lives in the system instruction instead
+FULL_RESUME_PROMPT_TEMPLATE = """Conversation history:
+{history_text}
+
+User question: {question}
+
+Answer:"""
+
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash')
+_model = None
+_model_resume_hash = None
+_model_lock = threading.Lock()
+
+def get_model(resume_index):
+    """Long-lived Gemini model for this worker, created on first use (after
+    any fork) and rebuilt only if the resume in its system instruction changes"""
+    global _model, _model_resume_hash
+    resume_hash = resume_index.content_hash if RAG_TOP_K == 0 else None
+    with _model_lock:
+        if _model is None or _model_resume_hash != resume_hash:
+            instruction = SYSTEM_INSTRUCTION
+            if resume_hash is not None:
+                instruction += f"\nResume:\n{resume_index.text}\n"
+            _model = genai.GenerativeModel(GEMINI_MODEL, system_instruction=instruction)
+            _model_resume_hash = resume_hash
+        return _model
+
+def build_prompt(question, history, resume_index, summary=''):
+    """Prompt for a question: persona rules, history and retrieved resume sections"""
+    # Format history as text: the rolling summary of older turns, then recent turns verbatim
+    history_text = ""
+    if summary:
+        history_text += f"Earlier in this conversation:\n{summary}\n\n"
+    for q, a in history:
+        history_text += f"Previous question: {q}\nPrevious answer: {a}\n\n"
+
+    if RAG_TOP_K == 0:
+        return FULL_RESUME_PROMPT_TEMPLATE.format(history_text=history_text, question=question)
+
+    # Retrieve only the resume sections relevant to this question; the
+    # previous question is included so follow-ups keep their topic
+    retrieval_query = question
+    if history:
+        retrieval_query = f"{history[-1][0]} {question}"
+    context = resume_index.context_for(retrieval_query, top_k=RAG_TOP_K, min_score=RAG_MIN_SCORE)
+
+    return PROMPT_TEMPLATE.format(history_text=history_text, context=context, question=question)
+
+def generate_answer(question, history, resume_index, summary='', deadline=None):
+    """Return Gemini's answer text for a question"""
+    deadline = deadline or Deadline(ASK_BUDGET)
+    prompt = build_prompt(question, history, resume_index, summary)
+    print("Generating answer with Gemini...")
+
+    def attempt():
+        with gemini_limit.slot(deadline.at):
+            response = get_model(resume_index).generate_content(
+                prompt, request_options={'timeout': deadline.timeout()})
+        return response.text
+
+    return retry_call(attempt, deadline, is_transient, attempts=UPSTREAM_ATTEMPTS,
+                      on_retry=retry_logger('gemini'))
+
+def stream_answer(question, history, resume_index, summary='', deadline=None):
+    """Yield Gemini's answer as text deltas while it is being generated.
+    A failed call is retried only if nothing has been yielded yet."""
+    deadline = deadline or Deadline(ASK_BUDGET)
+    prompt = build_prompt(question, history, resume_index, summary)
+    print("Streaming answer from Gemini...")
+    delays = backoff_delays(UPSTREAM_ATTEMPTS, 0.25, 2.0)
+    while True:
+        started = False
+        try:
+            with gemini_limit.slot(deadline.at):
+                for chunk in get_model(resume_index).generate_content(
+                        prompt, stream=True, request_options={'timeout': deadline.timeout()}):
+                    if chunk.text:
+                        started = True
+                        yield chunk.text
+            return
+        except Exception as e:
+            delay = None if started else next_retry_delay(delays, e, deadline, is_transient)
+            if delay is None:
+                raise
+            retry_logger('gemini')(e)
+            time.sleep(delay)
+
+async def generate_answer_async(question, history, resume_index, summary='', deadline=None):
+    """generate_answer() for the asyncio serving path; doesn't block the event loop"""
+    deadline = deadline or Deadline(ASK_BUDGET)
+    prompt = build_prompt(question, history, resume_index, summary)
+    print("Generating answer with Gemini (async)...")
+
+    async def attempt():
+        async with gemini_limit.slot_async(deadline.at):
+            response = await get_model(resume_index).generate_content_async(
+                prompt, request_options={'timeout': deadline.timeout()})
+        return response.text
+
+    return await retry_call_async(attempt, deadline, is_transient, attempts=UPSTREAM_ATTEMPTS,
+                                  on_retry=retry_logger('gemini'))
+
+async def stream_answer_async(question, history, resume_index, summary='', deadline=None):
+    """stream_answer() for the asyncio serving path"""
+    deadline = deadline or Deadline(ASK_BUDGET)
+    prompt = build_prompt(question, history, resume_index, summary)
+    print("Streaming answer from Gemini (async)...")
+    delays = backoff_delays(UPSTREAM_ATTEMPTS, 0.25, 2.0)
+    while True:
+        started = False
+        try:
+            async with gemini_limit.slot_async(deadline.at):
+                response = await get_model(resume_index).generate_content_async(
+                    prompt, stream=True, request_options={'timeout': deadline.timeout()})
+                async for chunk in response:
+                    if chunk.text:
+                        started = True
+                        yield chunk.text
+            return
+        except Exception as e:
+            delay = None if started else next_retry_delay(delays, e, deadline, is_transient)
+            if delay is None:
+                raise
+            retry_logger('gemini')(e)
+            await asyncio.sleep(delay)
+
+def lookup_cached_answer(question, cache_key, resume_index):
+    """Return (answer, audio bytes) from the exact or near-duplicate cache, or None"""
+    cached = answer_cache.get(cache_key)
+    if cached is None:
+        match = similar_questions.lookup(question, resume_index.content_hash)
+        if match is not None:
+            matched_question, answer_text, audio, score = match
+            print(f"Near-duplicate of '{matched_question}' (similarity {score:.2f})")
+            cached = (answer_text, audio)
+    return cached
+
+def store_answer(question, cache_key, answer_text, audio, resume_index):
+    answer_cache.put(cache_key, answer_text, audio)
+    similar_questions.add(question, answer_text, audio, resume_index.content_hash)
+
+def warm_up(questions):
+    """Answer and synthesize the seed questions ahead of time so first
+    visitors asking them are served straight from the cache"""
+    resume_index = get_resume_index()
+    warmed = 0
+    for question in questions:
+        cache_key = make_key(question, resume_index.content_hash)
+        if lookup_cached_answer(question, cache_key, resume_index) is not None:
+            continue
+        try:
+            answer_text = generate_answer(question, [], resume_index)
+            audio = text_to_speech(answer_text)
+            if audio is not None:
+                store_answer(question, cache_key, answer_text, audio, resume_index)
+                warmed += 1
+        except Exception as e:
+            print(f"Warm-up failed for '{question}': {e}")
+    print(f"Warm-up finished: {warmed}/{len(questions)} questions cached")
+
+_warm_up_started = False
+_warm_up_lock = threading.Lock()
+
+def start_warm_up():
+    """Run warm_up() on a background thread unless disabled with WARMUP=0.
+    Only the first call in a process does anything.
+
+    WARMUP_QUESTIONS overrides the seed list ('|' separated).
+    """
+    global _warm_up_started
+    with _warm_up_lock:
+        if _warm_up_started:
+            return None
+        _warm_up_started = True
+    if os.getenv('WARMUP', '1') == '0':
+        return None
+    if not GEMINI_API_KEY:
+        print("Warm-up skipped: GEMINI_API_KEY is not set")
+        return None
+    seeds = os.getenv('WARMUP_QUESTIONS')
+    if seeds:
+        questions = [q.strip() for q in seeds.split('|') if q.strip()]
+    else:
+        questions = SUGGESTIONS_RIGHT + SUGGESTIONS_LEFT
+    thread = threading.Thread(target=warm_up, args=(questions,), name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
 @app.route('/model/<path:filename>')
 def serve_model(filename):
-    """Serve 3D model files"""
-    return send_from_directory('.', filename)
+    """Serve 3D model files; fingerprinted names are cached for good"""
+    return model_assets.send(filename, request)
+
+@app.route('/model/<path:filename>.manifest.json')
+def serve_model_manifest(filename):
+    """Morph indices and bone names the page needs for a .glb model
+    (see avatar_manifest.py). Like the model itself, it is cached for good
+    under the model's fingerprinted name and revalidated under the plain one."""
+    name, immutable = model_assets.resolve(filename)
+    path = model_assets.path(name)
+    if path is None or not name.endswith('.glb'):
+        return jsonify({'error': 'Model not found'}), 404
+    try:
+        manifest, version = avatar_manifests.get(path)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 422
+    response = jsonify(manifest)
+    response.set_etag(version)
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
@@ -221,19 +695,17 @@ HTML_TEMPLATE = '''
     <div id="canvas-container"></div>
     
     <div class="suggestions-right">
-    <p>“Tell me about your MSc in AI.”</p>
-    <p> </p>
-    <p>“What AI tools do you use most?”</p>
-    <p> </p>
-    <p>“What are your publications?”</p>
+    {% for suggestion in suggestions_right %}
+    <p>“{{ suggestion }}”</p>
+    {% if not loop.last %}<p> </p>{% endif %}
+    {% endfor %}
     </div>
 
     <div class="suggestions-left">
-    <p>Ask me about my experience</p>
-    <p> </p>
-    <p>Ask me about my projects</p>
-    <p> </p>
-    <p>Ask me about my research</p>   
+    {% for suggestion in suggestions_left %}
+    <p>{{ suggestion }}</p>
+    {% if not loop.last %}<p> </p>{% endif %}
+    {% endfor %}
     </div>
     
     <div class="debug-panel" id="debugPanel">
@@ -242,6 +714,7 @@ HTML_TEMPLATE = '''
           <div>Viseme: <span id="currentViseme">-</span></div>
           <div>Morph meshes: <span id="morphCount">0</span></div>
           <div>Speaking: <span id="speakingStatus">No</span></div>
+          <div>Startup: <span id="bootTimings">-</span></div>
     </div>
     
     <div class="transcript" id="transcript">
@@ -261,6 +734,10 @@ HTML_TEMPLATE = '''
     
     <audio id="audioPlayer"></audio>
 
+    {% if vendor_url %}
+    <!-- Three.js, GLTFLoader and wawa-lipsync, bundled from vendor/ -->
+    <script src="{{ vendor_url }}"></script>
+    {% else %}
     <!-- Load Three.js and GLTFLoader -->
     <script src="https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js"></script>
     <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/loaders/GLTFLoader.js"></script>
@@ -268,6 +745,7 @@ HTML_TEMPLATE = '''
     <!-- Load wawa-lipsync via UMD - try multiple sources -->
     <script src="https://unpkg.com/wawa-lipsync@1.0.2/dist/index.umd.js" 
             onerror="console.error('Failed to load from unpkg, trying jsdelivr...'); this.onerror=null; this.src='https://cdn.jsdelivr.net/npm/wawa-lipsync@1.0.2/dist/index.umd.js'"></script>
+    {% endif %}
     
     <script>
         let scene, camera, renderer, avatar, mixer, clock;
@@ -278,6 +756,13 @@ HTML_TEMPLATE = '''
         let morphTargetMeshes = [];
         let audioContext, analyser, dataArray;
         let useFallbackLipsync = false;
+        // Server-made viseme timeline for the audio playing now, if it came with one
+        let visemeTrack = null;
+        let visemeTrackIndex = 0;
+        // One conversation per page load, so visitors don't share history
+        const sessionId = (window.crypto && crypto.randomUUID)
+            ? crypto.randomUUID()
+            : Date.now().toString(36) + Math.random().toString(36).slice(2);
         
         // Animation state
         let eyeBlinkTimer = 0;
@@ -330,6 +815,8 @@ HTML_TEMPLATE = '''
         
         // Store discovered morph targets for each mesh
         const discoveredMorphTargets = new Map();
+        // Blink morph indices per mesh, from the avatar manifest
+        const blinkMorphIndices = new Map();
         let lastViseme = 'X';
         let visemeTransition = 0; // For smooth interpolation
         const visemeBlendDamping = 0.18; // Lower = smoother lip motion
@@ -368,32 +855,75 @@ HTML_TEMPLATE = '''
             return false;
         }
 
-        // Initialize Three.js scene
+        // Resolves true once the lipsync library is there, or false when it is given up on:
+        // after the page's load event (no script can still arrive) or after timeoutMs
+        function waitForLipsync(timeoutMs = 10000) {
+            return new Promise(resolve => {
+                if (initLipsync()) return resolve(true);
+                console.log('Waiting for lipsync library...');
+                const started = performance.now();
+                const timer = setInterval(() => {
+                    if (initLipsync()) {
+                        clearInterval(timer);
+                        resolve(true);
+                    } else if (document.readyState === 'complete' || performance.now() - started >= timeoutMs) {
+                        clearInterval(timer);
+                        resolve(false);
+                    }
+                }, 100);
+            });
+        }
+
+        // Start-up phase timings, in ms since navigation started, for the debug panel
+        const bootTimings = {};
+
+        function markBootPhase(phase) {
+            bootTimings[phase] = Math.round(performance.now());
+            console.log(`Startup: ${phase} at ${bootTimings[phase]}ms`);
+            document.getElementById('bootTimings').textContent = Object.entries(bootTimings)
+                .map(([name, ms]) => `${name} ${ms}`).join(' · ') + ' ms';
+        }
+
+        // Start the page: the model download, the renderer and the lipsync check run
+        // side by side, so it is ready as soon as the slowest of them is
         async function initScene() {
-            // Wait for lipsync library to load with extended timeout
-            console.log('Waiting for lipsync library...');
-            let retries = 0;
-            const maxRetries = 100; // 10 seconds
-            
-            while (!initLipsync() && retries < maxRetries) {
-                await new Promise(resolve => setTimeout(resolve, 100));
-                retries++;
-                
-                if (retries % 10 === 0) {
-                    console.log(`Still waiting for lipsync... (${retries * 100}ms)`);
+            markBootPhase('start');
+            
+            // Model first, so the download is under way while everything else is set up;
+            // it is only added to the scene from a callback, after setupRenderer() has run
+            const modelLoaded = loadCustomModel('{{ avatar_url }}')
+                .then(() => console.log('✓ Custom model loaded'))
+                .catch(error => {
+                    console.log('Using default avatar', error);
+                    createDefaultAvatar();
+                })
+                .then(() => markBootPhase('model'));
+            
+            const lipsyncReady = waitForLipsync().then(found => {
+                if (!found) {
+                    console.error('Lipsync library failed to load');
+                    console.log('Window properties:', Object.keys(window).filter(k => k.toLowerCase().includes('lip') || k.toLowerCase().includes('wawa')));
+                    console.log('Switching to fallback audio-reactive lip sync');
+                    document.getElementById('lipsyncStatus').textContent = 'Using fallback';
+                    document.getElementById('lipsyncStatus').style.color = '#ffaa00';
+                    useFallbackLipsync = true;
+                    setupFallbackLipsync();
                 }
-            }
+                markBootPhase('lipsync');
+            });
             
-            if (retries >= maxRetries) {
-                console.error('Lipsync library failed to load after 10 seconds');
-                console.log('Window properties:', Object.keys(window).filter(k => k.toLowerCase().includes('lip') || k.toLowerCase().includes('wawa')));
-                console.log('Switching to fallback audio-reactive lip sync');
-                document.getElementById('lipsyncStatus').textContent = 'Using fallback';
-                document.getElementById('lipsyncStatus').style.color = '#ffaa00';
-                useFallbackLipsync = true;
-                setupFallbackLipsync();
-            }
+            setupRenderer();
+            markBootPhase('renderer');
+            
+            // Render the lit, empty scene while the model arrives
+            animate();
             
+            await Promise.all([modelLoaded, lipsyncReady]);
+            markBootPhase('ready');
+        }
+
+        // Scene, camera, renderer, lights and mouse controls
+        function setupRenderer() {
             scene = new THREE.Scene();
             // Gradient background (will be animated)
             const bgColor1 = new THREE.Color(0x1f2126);
@@ -461,18 +991,6 @@ HTML_TEMPLATE = '''
             clock = new THREE.Clock();
             
             setupControls();
-            
-            // Try to load custom model
-            try {
-                await loadCustomModel('/model/avatar.glb');
-                console.log('✓ Custom model loaded');
-            } catch (error) {
-                console.log('Using default avatar');
-                createDefaultAvatar();
-            }
-            
-            // Start animation loop
-            animate();
         }
 
         function setupControls() {
@@ -512,133 +1030,20 @@ HTML_TEMPLATE = '''
         }
 
         function loadCustomModel(modelPath) {
+            // Fetched alongside the model: the morphs and bones to drive, resolved on the server
+            const manifestRequest = fetch(modelPath + '.manifest.json')
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null);
+            
             return new Promise((resolve, reject) => {
                 const loader = new THREE.GLTFLoader();
                 
                 loader.load(
                     modelPath,
                     (gltf) => {
-                        avatar = gltf.scene;
-                        avatar.position.set(0, 0, 0);
-                        avatar.castShadow = true;
-                        
-                        // Store original rotation and position for smooth idle animation
-                        avatar.userData.originalRotation = avatar.rotation.clone();
-                        avatar.userData.originalPosition = avatar.position.y; // Store for breathing animation
-                        
-                        // Find meshes with morph targets for lip sync and bones for animation
-                        avatar.traverse((child) => {
-                            if (child.isMesh) {
-                                child.castShadow = true;
-                                child.receiveShadow = true;
-                                
-                                // Improve material quality
-                                if (child.material) {
-                                    if (Array.isArray(child.material)) {
-                                        child.material.forEach(mat => {
-                                            if (mat.isMeshStandardMaterial || mat.isMeshPhongMaterial) {
-                                                mat.roughness = 0.7;
-                                                mat.metalness = 0.1;
-                                            }
-                                        });
-                                    } else {
-                                        if (child.material.isMeshStandardMaterial || child.material.isMeshPhongMaterial) {
-                                            child.material.roughness = 0.7;
-                                            child.material.metalness = 0.1;
-                                        }
-                                    }
-                                }
-                                
-                                if (child.morphTargetDictionary && child.morphTargetInfluences) {
-                                    console.log('Found morph target mesh:', child.name);
-                                    console.log('Available morphs:', Object.keys(child.morphTargetDictionary));
-                                    morphTargetMeshes.push(child);
-                                    
-                                    // Discover and map viseme morph targets
-                                    const meshMorphs = {};
-                                    const allMorphNames = Object.keys(child.morphTargetDictionary);
-                                    
-                                    // Try to find viseme morphs using various naming patterns
-                                    Object.keys(visemeMapping).forEach(visemeKey => {
-                                        const standardName = visemeMapping[visemeKey];
-                                        const variations = visemeNameVariations[standardName] || [standardName];
-                                        
-                                        // Try exact match first
-                                        for (const morphName of allMorphNames) {
-                                            const morphNameLower = morphName.toLowerCase();
-                                            
-                                            // Check if this morph name matches any variation
-                                            for (const variation of variations) {
-                                                if (morphNameLower === variation.toLowerCase() || 
-                                                    morphNameLower.includes(variation.toLowerCase().replace('viseme_', ''))) {
-                                                    const morphIndex = child.morphTargetDictionary[morphName];
-                                                    if (morphIndex !== undefined) {
-                                                        meshMorphs[visemeKey] = {
-                                                            index: morphIndex,
-                                                            name: morphName
-                                                        };
-                                                        console.log(`  ✓ Mapped viseme "${visemeKey}" to morph "${morphName}" (index ${morphIndex})`);
-                                                        break;
-                                                    }
-                                                }
-                                            }
-                                            if (meshMorphs[visemeKey]) break;
-                                        }
-                                    });
-                                    
-                                    // Store discovered morphs for this mesh
-                                    discoveredMorphTargets.set(child, meshMorphs);
-                                    const foundVisemes = Object.keys(meshMorphs);
-                                    console.log(`  ✓ Total visemes found for ${child.name}: ${foundVisemes.length}`);
-                                    if (foundVisemes.length > 0) {
-                                        console.log(`    Found visemes: ${foundVisemes.join(', ')}`);
-                                    } else {
-                                        console.warn(`    ⚠️ No visemes found! Available morph targets:`, allMorphNames.filter(n => n.toLowerCase().includes('viseme') || n.toLowerCase().includes('mouth') || n.toLowerCase().includes('lip')));
-                                    }
-                                }
-                            }
-                            
-                            // Find bones for animation
-                            if (child.isBone || child.type === 'Bone') {
-                                const boneName = child.name.toLowerCase();
-                                if (boneName.includes('head') && !headBone) {
-                                    headBone = child;
-                                    console.log('✓ Found head bone:', child.name);
-                                } else if (boneName.includes('neck') && !neckBone) {
-                                    neckBone = child;
-                                    console.log('✓ Found neck bone:', child.name);
-                                } else if (boneName.includes('spine') && !spineBone) {
-                                    spineBone = child;
-                                    console.log('✓ Found spine bone:', child.name);
-                                }
-                            }
-                        });
-                        
-                        document.getElementById('morphCount').textContent = morphTargetMeshes.length;
-                        if (morphTargetMeshes.length > 0) {
-                            document.getElementById('morphCount').style.color = '#00ff00';
-                        } else {
-                            document.getElementById('morphCount').style.color = '#ff0000';
-                        }
-                        
-                        // Scale model
-                        const box = new THREE.Box3().setFromObject(avatar);
-                        const size = box.getSize(new THREE.Vector3());
-                        const maxSize = Math.max(size.x, size.y, size.z);
-                        const scale = 2 / maxSize;
-                        avatar.scale.multiplyScalar(scale);
-                        
-                        avatar = gltf.scene;
-                        scene.add(avatar);
-                        
-                        // Setup animations
-                        if (gltf.animations && gltf.animations.length > 0) {
-                            mixer = new THREE.AnimationMixer(avatar);
-                            const idleAnimation = mixer.clipAction(gltf.animations[0]);
-                            idleAnimation.play();
-                        }
-                        
-                        resolve();
+                        manifestRequest
+                            .then(manifest => setupAvatar(gltf, manifest))
+                            .then(resolve, reject);
                     },
                     (progress) => {
                         if (progress.total) {
@@ -652,6 +1057,150 @@ HTML_TEMPLATE = '''
             });
         }
 
+        // Add a loaded model to the scene. The manifest, when the server sent one,
+        // names the viseme and blink morphs and the bones; otherwise they are found by name.
+        function setupAvatar(gltf, manifest) {
+            avatar = gltf.scene;
+            avatar.position.set(0, 0, 0);
+            avatar.castShadow = true;
+            
+            // Store original rotation and position for smooth idle animation
+            avatar.userData.originalRotation = avatar.rotation.clone();
+            avatar.userData.originalPosition = avatar.position.y; // Store for breathing animation
+            
+            // Find meshes with morph targets for lip sync and bones for animation
+            avatar.traverse((child) => {
+                if (child.isMesh) {
+                    child.castShadow = true;
+                    child.receiveShadow = true;
+                    
+                    // Improve material quality
+                    if (child.material) {
+                        if (Array.isArray(child.material)) {
+                            child.material.forEach(mat => {
+                                if (mat.isMeshStandardMaterial || mat.isMeshPhongMaterial) {
+                                    mat.roughness = 0.7;
+                                    mat.metalness = 0.1;
+                                }
+                            });
+                        } else {
+                            if (child.material.isMeshStandardMaterial || child.material.isMeshPhongMaterial) {
+                                child.material.roughness = 0.7;
+                                child.material.metalness = 0.1;
+                            }
+                        }
+                    }
+                    
+                    if (child.morphTargetDictionary && child.morphTargetInfluences) {
+                        console.log('Found morph target mesh:', child.name);
+                        console.log('Available morphs:', Object.keys(child.morphTargetDictionary));
+                        morphTargetMeshes.push(child);
+                        
+                        const entry = manifest && manifest.meshes[child.userData.name || child.name];
+                        if (entry) {
+                            // Resolved on the server from the model's morph target names
+                            const meshMorphs = {};
+                            Object.keys(entry.visemes).forEach(visemeKey => {
+                                meshMorphs[visemeKey] = { index: entry.visemes[visemeKey], name: visemeMapping[visemeKey] };
+                            });
+                            discoveredMorphTargets.set(child, meshMorphs);
+                            blinkMorphIndices.set(child, entry.blink);
+                        } else {
+                            discoverMorphTargets(child);
+                        }
+                    }
+                }
+                
+                // Find bones for animation
+                if ((child.isBone || child.type === 'Bone') && manifest) {
+                    const boneName = child.userData.name || child.name;
+                    if (boneName === manifest.bones.head) headBone = child;
+                    else if (boneName === manifest.bones.neck) neckBone = child;
+                    else if (boneName === manifest.bones.spine) spineBone = child;
+                } else if (child.isBone || child.type === 'Bone') {
+                    const boneName = child.name.toLowerCase();
+                    if (boneName.includes('head') && !headBone) {
+                        headBone = child;
+                        console.log('✓ Found head bone:', child.name);
+                    } else if (boneName.includes('neck') && !neckBone) {
+                        neckBone = child;
+                        console.log('✓ Found neck bone:', child.name);
+                    } else if (boneName.includes('spine') && !spineBone) {
+                        spineBone = child;
+                        console.log('✓ Found spine bone:', child.name);
+                    }
+                }
+            });
+            
+            document.getElementById('morphCount').textContent = morphTargetMeshes.length;
+            if (morphTargetMeshes.length > 0) {
+                document.getElementById('morphCount').style.color = '#00ff00';
+            } else {
+                document.getElementById('morphCount').style.color = '#ff0000';
+            }
+            
+            // Scale model
+            const box = new THREE.Box3().setFromObject(avatar);
+            const size = box.getSize(new THREE.Vector3());
+            const maxSize = Math.max(size.x, size.y, size.z);
+            const scale = 2 / maxSize;
+            avatar.scale.multiplyScalar(scale);
+            
+            avatar = gltf.scene;
+            scene.add(avatar);
+            
+            // Setup animations
+            if (gltf.animations && gltf.animations.length > 0) {
+                mixer = new THREE.AnimationMixer(avatar);
+                const idleAnimation = mixer.clipAction(gltf.animations[0]);
+                idleAnimation.play();
+            }
+        }
+
+        // Match a mesh's morph target names against the viseme naming variations
+        function discoverMorphTargets(child) {
+            const meshMorphs = {};
+            const allMorphNames = Object.keys(child.morphTargetDictionary);
+            
+            // Try to find viseme morphs using various naming patterns
+            Object.keys(visemeMapping).forEach(visemeKey => {
+                const standardName = visemeMapping[visemeKey];
+                const variations = visemeNameVariations[standardName] || [standardName];
+                
+                // Try exact match first
+                for (const morphName of allMorphNames) {
+                    const morphNameLower = morphName.toLowerCase();
+                    
+                    // Check if this morph name matches any variation
+                    for (const variation of variations) {
+                        if (morphNameLower === variation.toLowerCase() || 
+                            morphNameLower.includes(variation.toLowerCase().replace('viseme_', ''))) {
+                            const morphIndex = child.morphTargetDictionary[morphName];
+                            if (morphIndex !== undefined) {
+                                meshMorphs[visemeKey] = {
+                                    index: morphIndex,
+                                    name: morphName
+                                };
+                                console.log(`  ✓ Mapped viseme "${visemeKey}" to morph "${morphName}" (index ${morphIndex})`);
+                                break;
+                            }
+                        }
+                    }
+                    if (meshMorphs[visemeKey]) break;
+                }
+            });
+            
+            // Store discovered morphs for this mesh
+            discoveredMorphTargets.set(child, meshMorphs);
+            const foundVisemes = Object.keys(meshMorphs);
+            console.log(`  ✓ Total visemes found for ${child.name}: ${foundVisemes.length}`);
+            if (foundVisemes.length > 0) {
+                console.log(`    Found visemes: ${foundVisemes.join(', ')}`);
+            } else {
+                console.warn(`    ⚠️ No visemes found! Available morph targets:`, allMorphNames.filter(n => n.toLowerCase().includes('viseme') || n.toLowerCase().includes('mouth') || n.toLowerCase().includes('lip')));
+            }
+        }
+
         function createDefaultAvatar() {
             avatar = new THREE.Group();
             
@@ -798,6 +1347,23 @@ HTML_TEMPLATE = '''
             return 'X'; // Closed
         }
 
+        // Viseme at the current playback time, from the server's track. The
+        // track is timed for duration_ms; stretch it to the audio's real length.
+        function getTrackViseme() {
+            const audioPlayer = document.getElementById('audioPlayer');
+            const track = visemeTrack.track;
+            let ms = audioPlayer.currentTime * 1000;
+            if (isFinite(audioPlayer.duration) && audioPlayer.duration > 0) {
+                ms *= visemeTrack.duration_ms / (audioPlayer.duration * 1000);
+            }
+            // Entries are in time order: walk forward from the last one, restart after a seek back
+            if (track[visemeTrackIndex][0] > ms) visemeTrackIndex = 0;
+            while (visemeTrackIndex + 1 < track.length && track[visemeTrackIndex + 1][0] <= ms) {
+                visemeTrackIndex++;
+            }
+            return track[visemeTrackIndex][1];
+        }
+
         // Update lip sync based on audio analysis with smooth interpolation
         function updateLipsync() {
             if (!isSpeaking) {
@@ -826,7 +1392,10 @@ HTML_TEMPLATE = '''
             let currentViseme;
             
             try {
-                if (useFallbackLipsync) {
+                if (visemeTrack) {
+                    // Timeline sent with the audio; no per-frame audio analysis
+                    currentViseme = getTrackViseme();
+                } else if (useFallbackLipsync) {
                     // Use fallback audio-reactive lip sync
                     currentViseme = getFallbackViseme();
                 } else if (lipsyncManager) {
@@ -946,12 +1515,19 @@ HTML_TEMPLATE = '''
                 
                 // Apply blink to morph targets or mesh
                 if (morphTargetMeshes.length > 0) {
+                    const blinkAmount = Math.sin(eyeBlinkDuration * Math.PI);
                     morphTargetMeshes.forEach(mesh => {
+                        const blinkIndices = blinkMorphIndices.get(mesh);
+                        if (blinkIndices) {
+                            blinkIndices.forEach(morphIndex => {
+                                mesh.morphTargetInfluences[morphIndex] = blinkAmount;
+                            });
+                            return;
+                        }
                         const blinkMorphs = ['eyeBlinkLeft', 'eyeBlinkRight', 'blink', 'eyeClose'];
                         blinkMorphs.forEach(morphName => {
                             const morphIndex = mesh.morphTargetDictionary[morphName];
                             if (morphIndex !== undefined) {
-                                const blinkAmount = Math.sin(eyeBlinkDuration * Math.PI);
                                 mesh.morphTargetInfluences[morphIndex] = blinkAmount;
                             }
                         });
@@ -1164,99 +1740,215 @@ HTML_TEMPLATE = '''
             }
         }
 
+        // Stream the answer over server-sent events so text appears as it is
+        // generated. Resolves to null when streaming isn't available, so the
+        // caller can fall back to the plain JSON endpoint.
+        async function askStreaming(question, onDelta, onAudio) {
+            if (!window.ReadableStream || !window.TextDecoder) return null;
+            
+            let response;
+            try {
+                response = await fetch('/ask/stream', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ question: question, session_id: sessionId })
+                });
+            } catch (e) {
+                console.warn('Streaming request failed, falling back to /ask:', e);
+                return null;
+            }
+            // Server is shedding load; asking again on /ask would only add to it
+            if (response.status === 503) return response.json();
+            if (!response.ok || !response.body) return null;
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let result = { error: 'Stream ended unexpectedly' };
+            
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                
+                let boundary;
+                while ((boundary = buffer.indexOf('\\n\\n')) !== -1) {
+                    const rawEvent = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    
+                    let eventName = 'message';
+                    let payload = '';
+                    rawEvent.split('\\n').forEach(line => {
+                        if (line.startsWith('event: ')) eventName = line.slice(7);
+                        else if (line.startsWith('data: ')) payload += line.slice(6);
+                    });
+                    const eventData = JSON.parse(payload || '{}');
+                    
+                    if (eventName === 'delta') {
+                        onDelta(eventData.text);
+                    } else if (eventName === 'audio') {
+                        onAudio(eventData.url, eventData.visemes);
+                    } else if (eventName === 'done' || eventName === 'error') {
+                        result = eventData;
+                    }
+                }
+            }
+            return result;
+        }
+
+        async function askJson(question) {
+            const response = await fetch('/ask', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ question: question, session_id: sessionId })
+            });
+            return response.json();
+        }
+
+        // Answer audio arrives sentence by sentence; play the segments back to back
+        let audioQueue = [];
+        let audioQueuePlaying = false;
+
+        function enqueueAnswerAudio(audioUrl, visemes) {
+            audioQueue.push({ url: audioUrl, visemes: visemes });
+            if (!audioQueuePlaying) playNextAudioSegment();
+        }
+
+        function playNextAudioSegment() {
+            const next = audioQueue.shift();
+            if (next === undefined) {
+                audioQueuePlaying = false;
+                isSpeaking = false;
+                document.getElementById('status').textContent = 'Click to speak';
+                document.getElementById('speakingStatus').textContent = 'No';
+                document.getElementById('speakingStatus').style.color = '#ffffff';
+                return;
+            }
+            audioQueuePlaying = true;
+            playAnswerAudio(next.url, playNextAudioSegment, next.visemes);
+        }
+
+        function playAnswerAudio(audioUrl, onEnded, visemes) {
+            const audioPlayer = document.getElementById('audioPlayer');
+            
+            // Set audio source FIRST (required by wawa-lipsync)
+            // Streamed from /audio/<id>; playback can start before the file is complete
+            audioPlayer.src = audioUrl;
+            visemeTrack = visemes && visemes.track && visemes.track.length ? visemes : null;
+            visemeTrackIndex = 0;
+            
+            console.log('Audio loaded, connecting to lipsync...');
+            
+            // Connect audio to lipsync manager or fallback
+            if (visemeTrack) {
+                // The mouth follows the server's timeline; nothing to analyse
+                document.getElementById('lipsyncStatus').textContent = 'Server visemes';
+                document.getElementById('lipsyncStatus').style.color = '#00ff00';
+            } else if (useFallbackLipsync || !lipsyncManager) {
+                // Use Web Audio API for fallback
+                try {
+                    // Recreate audio context if needed (some browsers require user interaction)
+                    if (!audioContext || audioContext.state === 'closed') {
+                        audioContext = new (window.AudioContext || window.webkitAudioContext)();
+                        analyser = audioContext.createAnalyser();
+                        analyser.fftSize = 512; // Higher resolution for better detection
+                        analyser.smoothingTimeConstant = 0.3;
+                        dataArray = new Uint8Array(analyser.frequencyBinCount);
+                        console.log('✓ Recreated audio context');
+                    }
+                    
+                    // Disconnect any existing source
+                    if (audioContext.state === 'suspended') {
+                        audioContext.resume();
+                    }
+                    
+                    const source = audioContext.createMediaElementSource(audioPlayer);
+                    source.connect(analyser);
+                    analyser.connect(audioContext.destination);
+                    console.log('✓ Fallback audio analyzer connected');
+                    document.getElementById('lipsyncStatus').textContent = 'Fallback active';
+                    document.getElementById('lipsyncStatus').style.color = '#00ff00';
+                    useFallbackLipsync = true;
+                } catch (e) {
+                    console.error('Fallback connection error:', e);
+                    // If createMediaElementSource fails (already connected), just use the analyser
+                    if (e.name === 'InvalidStateError' || e.message.includes('already connected')) {
+                        console.log('Audio already connected, using existing analyser');
+                        useFallbackLipsync = true;
+                    }
+                }
+            } else if (lipsyncManager) {
+                try {
+                    lipsyncManager.connectAudio(audioPlayer);
+                    console.log('✓ Lipsync connected to audio');
+                    document.getElementById('lipsyncStatus').textContent = 'Connected';
+                    document.getElementById('lipsyncStatus').style.color = '#00ff00';
+                } catch (e) {
+                    console.error('Lipsync connection error:', e);
+                    document.getElementById('lipsyncStatus').textContent = 'Error: ' + e.message;
+                    document.getElementById('lipsyncStatus').style.color = '#ff0000';
+                }
+            } else {
+                console.error('No lipsync available!');
+                document.getElementById('lipsyncStatus').textContent = 'Not available';
+                document.getElementById('lipsyncStatus').style.color = '#ff0000';
+            }
+            
+            isSpeaking = true;
+            document.getElementById('status').textContent = 'Speaking...';
+            
+            // A segment that failed to synthesize is skipped rather than stalling the queue
+            audioPlayer.onerror = () => {
+                console.warn('Audio segment failed to load:', audioUrl);
+                if (onEnded) onEnded();
+            };
+            
+            audioPlayer.onended = () => {
+                if (onEnded) {
+                    onEnded();
+                    return;
+                }
+                isSpeaking = false;
+                document.getElementById('status').textContent = 'Click to speak';
+                document.getElementById('speakingStatus').textContent = 'No';
+                document.getElementById('speakingStatus').style.color = '#ffffff';
+            };
+            
+            // Play audio
+            audioPlayer.play().catch(e => {
+                console.log('Autoplay prevented, trying manual play:', e);
+                setTimeout(() => audioPlayer.play(), 100);
+            });
+        }
+
         async function processQuestion(question) {
             const loading = document.getElementById('loading');
-            const audioPlayer = document.getElementById('audioPlayer');
+            const answerText = document.getElementById('answerText');
             
             loading.style.display = 'block';
             document.getElementById('status').textContent = 'Thinking...';
+            // Drop any segments still queued from the previous answer
+            audioQueue = [];
             
             try {
-                const response = await fetch('/ask', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ question: question })
-                });
-                
-                const data = await response.json();
+                let streamedText = '';
+                let data = await askStreaming(question, (delta) => {
+                    // Show words as soon as they arrive
+                    if (!streamedText) loading.style.display = 'none';
+                    streamedText += delta;
+                    answerText.textContent = 'Me: ' + streamedText;
+                }, enqueueAnswerAudio);
+                if (!data) {
+                    data = await askJson(question);
+                }
                 
                 if (data.error) {
                     document.getElementById('status').textContent = 'Error: ' + data.error;
                 } else {
-                    document.getElementById('answerText').textContent = 'Me: ' + data.answer;
+                    answerText.textContent = 'Me: ' + data.answer;
                     
-                    if (data.audio) {
-                        // Set audio source FIRST (required by wawa-lipsync)
-                        audioPlayer.src = 'data:audio/mp3;base64,' + data.audio;
-                        
-                        console.log('Audio loaded, connecting to lipsync...');
-                        
-                        // Connect audio to lipsync manager or fallback
-                        if (useFallbackLipsync || !lipsyncManager) {
-                            // Use Web Audio API for fallback
-                            try {
-                                // Recreate audio context if needed (some browsers require user interaction)
-                                if (!audioContext || audioContext.state === 'closed') {
-                                    audioContext = new (window.AudioContext || window.webkitAudioContext)();
-                                    analyser = audioContext.createAnalyser();
-                                    analyser.fftSize = 512; // Higher resolution for better detection
-                                    analyser.smoothingTimeConstant = 0.3;
-                                    dataArray = new Uint8Array(analyser.frequencyBinCount);
-                                    console.log('✓ Recreated audio context');
-                                }
-                                
-                                // Disconnect any existing source
-                                if (audioContext.state === 'suspended') {
-                                    audioContext.resume();
-                                }
-                                
-                                const source = audioContext.createMediaElementSource(audioPlayer);
-                                source.connect(analyser);
-                                analyser.connect(audioContext.destination);
-                                console.log('✓ Fallback audio analyzer connected');
-                                document.getElementById('lipsyncStatus').textContent = 'Fallback active';
-                                document.getElementById('lipsyncStatus').style.color = '#00ff00';
-                                useFallbackLipsync = true;
-                            } catch (e) {
-                                console.error('Fallback connection error:', e);
-                                // If createMediaElementSource fails (already connected), just use the analyser
-                                if (e.name === 'InvalidStateError' || e.message.includes('already connected')) {
-                                    console.log('Audio already connected, using existing analyser');
-                                    useFallbackLipsync = true;
-                                }
-                            }
-                        } else if (lipsyncManager) {
-                            try {
-                                lipsyncManager.connectAudio(audioPlayer);
-                                console.log('✓ Lipsync connected to audio');
-                                document.getElementById('lipsyncStatus').textContent = 'Connected';
-                                document.getElementById('lipsyncStatus').style.color = '#00ff00';
-                            } catch (e) {
-                                console.error('Lipsync connection error:', e);
-                                document.getElementById('lipsyncStatus').textContent = 'Error: ' + e.message;
-                                document.getElementById('lipsyncStatus').style.color = '#ff0000';
-                            }
-                        } else {
-                            console.error('No lipsync available!');
-                            document.getElementById('lipsyncStatus').textContent = 'Not available';
-                            document.getElementById('lipsyncStatus').style.color = '#ff0000';
-                        }
-                        
-                        isSpeaking = true;
-                        document.getElementById('status').textContent = 'Speaking...';
-                        
-                        audioPlayer.onended = () => {
-                            isSpeaking = false;
-                            document.getElementById('status').textContent = 'Click to speak';
-                            document.getElementById('speakingStatus').textContent = 'No';
-                            document.getElementById('speakingStatus').style.color = '#ffffff';
-                        };
-                        
-                        // Play audio
-                        audioPlayer.play().catch(e => {
-                            console.log('Autoplay prevented, trying manual play:', e);
-                            setTimeout(() => audioPlayer.play(), 100);
-                        });
+                    if (data.audio_url) {
+                        playAnswerAudio(data.audio_url, undefined, data.visemes);
                     }
                 }
             } catch (error) {
@@ -1267,83 +1959,362 @@ HTML_TEMPLATE = '''
             }
         }
 
-        window.addEventListener('load', initScene);
+        // Not on 'load', which also waits for the preloaded model that initScene is loading
+        if (document.readyState === 'loading') {
+            document.addEventListener('DOMContentLoaded', initScene);
+        } else {
+            initScene();
+        }
     </script>
 </body>
 </html>
 '''
 
+# The page is the same for every visitor, so it is rendered once at startup:
+# a small HTML shell plus its CSS and JS as fingerprinted /assets/ files,
+# each kept in memory with its gzip/brotli forms
+page_assets = BuiltAssets('/assets')
+INLINE_STYLE = re.compile(r'<style>(.*?)</style>', re.S)
+INLINE_SCRIPT = re.compile(r'<script>(.*?)</script>', re.S)
+
+def build_page():
+    """Render HTML_TEMPLATE and move its inline <style> and <script> out into
+    assets; returns the Link header that preloads what the page needs first"""
+    vendor_js = build_bundle(VENDOR_DIR)
+    if vendor_js is None:
+        print(f"Not bundling {VENDOR_DIR}/ ({'; '.join(vendor_problems(VENDOR_DIR))}); "
+              f"the page loads its libraries from CDNs (see vendor_bundle.py)")
+    vendor_url = page_assets.add('vendor.js', vendor_js, 'text/javascript') if vendor_js else None
+    avatar_url = model_assets.url(AVATAR_MODEL) if model_assets.path(AVATAR_MODEL) else None
+    with app.app_context():
+        html = render_template_string(
+            HTML_TEMPLATE,
+            suggestions_left=SUGGESTIONS_LEFT,
+            suggestions_right=SUGGESTIONS_RIGHT,
+            avatar_url=avatar_url or f"/model/{AVATAR_MODEL}",
+            vendor_url=vendor_url,
+        )
+    css_url = page_assets.add('page.css', '\n'.join(INLINE_STYLE.findall(html)), 'text/css')
+    html = INLINE_STYLE.sub(f'<link rel="stylesheet" href="{css_url}">', html, count=1)
+    html = INLINE_STYLE.sub('', html)
+    # Scripts keep their place, so they still run after the libraries they use
+    js_url = page_assets.add('page.js', '\n'.join(INLINE_SCRIPT.findall(html)), 'text/javascript')
+    html = INLINE_SCRIPT.sub(f'<script src="{js_url}"></script>', html, count=1)
+    html = INLINE_SCRIPT.sub('', html)
+    page_assets.add('index.html', html, 'text/html')
+    for name in ('index.html', 'page.css', 'page.js') + (('vendor.js',) if vendor_url else ()):
+        print(f"Built {name}: " + ', '.join(f"{size} bytes {encoding}" for encoding, size in page_assets.sizes(name).items()))
+
+    # In the order the page uses them. The model and its manifest are fetched
+    # by script (XHR and fetch, both CORS-mode), hence crossorigin.
+    preloads = [f"<{css_url}>; rel=preload; as=style"]
+    if vendor_url:
+        preloads.append(f"<{vendor_url}>; rel=preload; as=script")
+    preloads.append(f"<{js_url}>; rel=preload; as=script")
+    if avatar_url:
+        preloads.append(f"<{avatar_url}>; rel=preload; as=fetch; crossorigin")
+        preloads.append(f"<{avatar_url}.manifest.json>; rel=preload; as=fetch; crossorigin")
+    return ', '.join(preloads)
+
+PAGE_PRELOADS = build_page()
+
 @app.route('/')
 def home():
-    return render_template_string(HTML_TEMPLATE)
+    """The pre-rendered page shell; revalidated on every visit (ETag, 304).
+    The Link header lets the browser, or a CDN sending 103 Early Hints,
+    start on the scripts and the model before the HTML is parsed."""
+    response = page_assets.send('index.html', request)
+    response.headers['Link'] = PAGE_PRELOADS
+    return response
 
-@app.route('/ask', methods=['POST'])
-def ask():
-    try:
-        data = request.get_json()
-        question = data.get('question', '')
-        session_id = data.get('session_id', 'default')  # fallback for single-session use
-        
-        if not question:
-            return jsonify({'error': 'No question provided'}), 400
+@app.route('/assets/<path:filename>')
+def serve_page_asset(filename):
+    """The page's CSS and JS; fingerprinted names are cached for good"""
+    return page_assets.send(filename, request)
 
-        print(f"Question received: {question}")
+@app.route('/stats')
+def stats():
+    """Cache counters for sizing and monitoring"""
+    return jsonify({
+        'answer_cache': answer_cache.stats(),
+        'similar_questions': similar_questions.stats(),
+        'tts_cache': tts_cache.stats(),
+        'audio_store': audio_store.stats(),
+        'sessions': conversation_history.stats(),
+        'single_flight': answer_flights.stats(),
+        'upstreams': {'gemini': gemini_limit.stats(), 'tts': tts_limit.stats()},
+        'tts_backend': tts_backend.stats(),
+        'speech_rate': speech_rate.stats(),
+        'paths': pipeline_paths.stats(),
+        'retries': upstream_retries.stats()
+    })
 
-        # Create history for the session if not exists
-        if session_id not in conversation_history:
-            conversation_history[session_id] = []
+@app.route('/audio/<audio_id>')
+def serve_audio(audio_id):
+    """Raw audio for an answer, waiting for synthesis if it is still running.
 
-        # Format history as text
-        history_text = ""
-        for q, a in conversation_history[session_id]:
-            history_text += f"Previous question: {q}\nPrevious answer: {a}\n\n"
+    Ids are derived from the spoken text, so the bytes behind an id never
+    change and browsers may cache them; Range requests are honoured.
+    """
+    audio = audio_store.get(audio_id, timeout=AUDIO_WAIT_TIMEOUT)
+    if audio is None:
+        return jsonify({'error': 'Audio not found'}), 404
+    response = Response(audio, mimetype=tts_backend.mimetype)
+    response.set_etag(audio_id)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    response.cache_control.immutable = True
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(audio))
 
-        # Load your RAG context
-        context = read_context_file()
+def sse_event(event, payload):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
 
-        # Build prompt including history
-        prompt = f"""
-You are assisting the user by answering questions using the provided resume documents only.
+def error_payload(e):
+    """Body for an 'error' event or error response; tells the client when to
+    retry if an upstream shed the request"""
+    print(f"Error: {str(e)}")
+    if isinstance(e, Overloaded):
+        pipeline_paths.record('shed')
+        return {'error': BUSY_MESSAGE, 'retry_after': e.retry_after}
+    if is_timeout(e):
+        pipeline_paths.record('deadline_exceeded')
+        return {'error': "That took too long to answer. Please try again."}
+    pipeline_paths.record('failed')
+    return {'error': str(e)}
 
-Respond in first person ("I", "my experience", "my background") as if you are the owner of the resume.
-In case asked about 'tell me about this portfolio.', refer to 'QandA System by Text Extraction from PDF' in projects and phrase it accordingly.
-Do NOT invent personal information that is not in the retrieved documents.
-If the answer is not found or looks closer to an information you have, first ask a follow up question to clarify, otherwise respond with:
-"That information isn't in my resume. Would you like to know anything else?"
+def is_timeout(e):
+    return isinstance(e, (DeadlineExceeded, google_exceptions.DeadlineExceeded, TimeoutError))
 
-Tone: concise, professional, confident, clear.
+def overloaded_response(e):
+    """Fast 503 with Retry-After for a request an upstream could not admit"""
+    response = jsonify(error_payload(e))
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
 
-Conversation history:
-{history_text}
+def check_capacity(cached):
+    """Raise Overloaded before a stream starts if it would need Gemini while
+    Gemini's queue is full; answers from the cache are still served"""
+    if cached is None:
+        gemini_limit.check()
 
-RAG Context:
-{context}
+def answer_from_cache(session_id, question, cached):
+    """Record a cached answer in the session and return the /ask payload"""
+    answer_text, audio = cached
+    print("Answer served from cache")
+    conversation_history.append(session_id, question, answer_text)
+    audio_id = publish_audio(answer_text, audio)
+    pipeline_paths.record('cached')
+    return {
+        'answer': answer_text,
+        'audio_id': audio_id,
+        'audio_url': f"/audio/{audio_id}",
+        'visemes': viseme_track(answer_text, audio),
+        'path': 'cached'
+    }
 
-User question: {question}
+def record_audio_failure(future):
+    if future.exception() is not None or future.result() is None:
+        pipeline_paths.record('audio_failed')
 
-Answer:"""
+def complete_answer(session_id, question, answer_text, cache_key, resume_index, is_first_turn, deadline=None):
+    """Record a freshly generated answer, start synthesizing it and return
+    the /ask payload"""
+    # Save this Q/A into session history
+    conversation_history.append(session_id, question, answer_text)
+
+    print(f"Answer generated: {answer_text[:100]}...")
+
+    # Text-to-speech is already shedding load: answer with text only rather than
+    # queue speech that would arrive long after the text
+    if tts_limit.saturated():
+        print("Speech skipped: text-to-speech is overloaded")
+        pipeline_paths.record('text_only')
+        return {'answer': answer_text, 'audio_id': None, 'audio_url': None, 'visemes': None, 'path': 'text_only'}
+
+    # Synthesize in the background; the page shows the text right away
+    # and fetches /audio/<id>, which waits for synthesis to finish
+    print("Converting answer to speech...")
+    audio_id = speech_id(answer_text)
+    late = deadline is not None and estimated_synthesis_seconds(answer_text) > deadline.remaining()
+    future = audio_store.submit(audio_id, text_to_speech, answer_text, Deadline(AUDIO_WAIT_TIMEOUT))
+    future.add_done_callback(record_audio_failure)
+    future.add_done_callback(learn_speech_rate(answer_text))
+    # Only first-turn answers are cached: later ones may lean on history
+    if is_first_turn:
+        when_all_synthesized([future], lambda audio: store_answer(
+            question, cache_key, answer_text, audio, resume_index))
+
+    # The text goes out now either way; 'audio_late' means speech is expected
+    # to be ready only after the request's budget has run out
+    path = 'audio_late' if late else 'full'
+    pipeline_paths.record(path)
+    return {
+        'answer': answer_text,
+        'audio_id': audio_id,
+        'audio_url': f"/audio/{audio_id}",
+        'visemes': viseme_track(answer_text),
+        'path': path
+    }
+
+def start_speech_segment(sentence, segments):
+    """Start synthesizing one sentence of a streamed answer in the background,
+    append its future to segments and return the 'audio' event for it (or
+    nothing when text-to-speech is shedding load and the sentence goes unspoken)"""
+    if tts_limit.saturated():
+        skipped = Future()
+        skipped.set_exception(Overloaded(tts_limit.name, 1))
+        segments.append(skipped)
+        return ''
+    segment_id = speech_id(sentence)
+    future = audio_store.submit(segment_id, synthesize_segment, sentence, Deadline(AUDIO_WAIT_TIMEOUT))
+    future.add_done_callback(learn_speech_rate(sentence))
+    segments.append(future)
+    return sse_event('audio', {
+        'index': len(segments) - 1,
+        'audio_id': segment_id,
+        'url': f"/audio/{segment_id}",
+        'visemes': viseme_track(sentence)
+    })
+
+def replay_answer(session_id, question, answer_text):
+    """SSE events for an answer another request generated: the whole text as
+    one delta, each sentence's audio (shared with the leader's synthesis
+    through AudioStore) and 'done'"""
+    segments = []
+    events = [sse_event('delta', {'text': answer_text})]
+    events += [start_speech_segment(sentence, segments) for sentence in split_sentences(answer_text)]
+    events.append(complete_streamed_answer(session_id, question, answer_text, segments, None, None, False))
+    return events
+
+def complete_streamed_answer(session_id, question, answer_text, segments, cache_key, resume_index, is_first_turn):
+    """Record a streamed answer and return its 'done' event"""
+    conversation_history.append(session_id, question, answer_text)
+    print(f"Answer generated: {answer_text[:100]}...")
+
+    if is_first_turn and segments:
+        when_all_synthesized(segments, lambda audio: store_answer(
+            question, cache_key, answer_text, audio, resume_index))
+    skipped = sum(1 for f in segments if f.done() and isinstance(f.exception(), Overloaded))
+    path = 'partial_audio' if skipped else 'full'
+    pipeline_paths.record(path)
+    return sse_event('done', {'answer': answer_text, 'segments': len(segments), 'path': path})
+
+@app.route('/ask/stream', methods=['POST'])
+def ask_stream():
+    """Same as /ask, but streams the answer as server-sent events:
+    'delta' events carry text as Gemini produces it, an 'audio' event with
+    the /audio URL of each sentence is sent as soon as the sentence is
+    complete (synthesis runs in the background), and a final 'done' event
+    carries the full answer (or an 'error' event)."""
+    data = request.get_json(silent=True) or {}
+    question = data.get('question', '')
+    session_id = data.get('session_id', 'default')
+
+    if not question:
+        return jsonify({'error': 'No question provided'}), 400
 
-        print("Generating answer with Gemini...")
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        response = model.generate_content(prompt)
-        answer_text = response.text
+    print(f"Question received (stream): {question}")
+    deadline = Deadline(ASK_BUDGET)
+    summary, history = conversation_history.snapshot(session_id)
+    # Only first-turn answers are cached, and only for first turns: a follow-up
+    # like "tell me more" means something different in every conversation
+    is_first_turn = not history and not summary
+    resume_index = get_resume_index()
+    cache_key = make_key(question, resume_index.content_hash)
+    cached = lookup_cached_answer(question, cache_key, resume_index) if is_first_turn else None
+    try:
+        check_capacity(cached)
+    except Overloaded as e:
+        return overloaded_response(e)
+
+    def events():
+        try:
+            if cached is not None:
+                payload = answer_from_cache(session_id, question, cached)
+                yield sse_event('delta', {'text': payload['answer']})
+                yield sse_event('done', payload)
+                return
+
+            flight, leader = answer_flights.join(cache_key) if is_first_turn else (None, True)
+            if not leader:
+                print("Waiting for the same question already being answered")
+                for event in replay_answer(session_id, question, flight.result()):
+                    yield event
+                return
+
+            parts = []
+            sentences = SentenceBuffer()
+            segments = []  # synthesis futures, in sentence order
+            try:
+                for delta in stream_answer(question, history, resume_index, summary, deadline):
+                    parts.append(delta)
+                    yield sse_event('delta', {'text': delta})
+                    for sentence in sentences.feed(delta):
+                        yield start_speech_segment(sentence, segments)
+                for sentence in sentences.flush():
+                    yield start_speech_segment(sentence, segments)
+            except BaseException as e:
+                if flight is not None:
+                    answer_flights.resolve(cache_key, flight, error=e)
+                raise
+            answer_text = ''.join(parts)
+            if flight is not None:
+                answer_flights.resolve(cache_key, flight, answer_text)
+
+            yield complete_streamed_answer(session_id, question, answer_text, segments,
+                                           cache_key, resume_index, is_first_turn)
+        except Exception as e:
+            yield sse_event('error', error_payload(e))
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # stop reverse proxies from buffering the stream
+    })
+
+@app.route('/ask', methods=['POST'])
+def ask():
+    try:
+        data = request.get_json()
+        question = data.get('question', '')
+        session_id = data.get('session_id', 'default')  # fallback for single-session use
+        
+        if not question:
+            return jsonify({'error': 'No question provided'}), 400
 
-        # Save this Q/A into session history
-        conversation_history[session_id].append((question, answer_text))
+        print(f"Question received: {question}")
+        deadline = Deadline(ASK_BUDGET)
 
-        print(f"Answer generated: {answer_text[:100]}...")
+        summary, history = conversation_history.snapshot(session_id)
+        # Follow-ups depend on the conversation, so only first turns use the cache
+        is_first_turn = not history and not summary
 
-        print("Converting answer to speech...")
-        audio_base64 = text_to_speech(answer_text)
+        resume_index = get_resume_index()
+        cache_key = make_key(question, resume_index.content_hash)
+        cached = lookup_cached_answer(question, cache_key, resume_index) if is_first_turn else None
+        if cached is not None:
+            return jsonify(answer_from_cache(session_id, question, cached))
 
-        return jsonify({
-            'answer': answer_text,
-            'audio': audio_base64
-        })
+        if is_first_turn:
+            # Identical concurrent questions wait for one Gemini call; only
+            # the request that made it caches the answer
+            answer_text, is_first_turn = answer_flights.do(
+                cache_key, generate_answer, question, history, resume_index, summary, deadline)
+        else:
+            answer_text = generate_answer(question, history, resume_index, summary, deadline)
+        return jsonify(complete_answer(
+            session_id, question, answer_text, cache_key, resume_index, is_first_turn, deadline))
 
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
-        print(f"Error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return jsonify(error_payload(e)), 504 if is_timeout(e) else 500
+
+# With gunicorn's preload_app the module is imported in the master, which must
+# not talk to Gemini before forking; gunicorn.conf.py warms each worker instead
+if os.getenv('WARMUP_DEFERRED') != '1':
+    start_warm_up()
 
 if __name__ == '__main__':
     print("=" * 70)
@@ -1354,7 +2325,7 @@ if __name__ == '__main__':
     print(f"Server starting on http://localhost:{port}")
     print()
     print("📁 Files needed:")
-    print("   - avatar.glb (your 3D model) - optional")
+    print("   - models/avatar.glb (your 3D model) - optional")
     print("   - resume.txt (your resume content)")
     print()
     print("✨ Features:")
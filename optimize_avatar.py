@@ -0,0 +1,567 @@
+"""Build-time optimizer for the avatar model served under /model/.
+
+    python optimize_avatar.py models/avatar.glb -o models/avatar.min.glb
+    python optimize_avatar.py models/avatar.glb -o models/avatar.min.glb --max-texture 512 --keep-morph mouthSmileLeft
+
+The page only drives the viseme and blink morph targets and animates the
+head, neck and spine bones, but a Ready Player Me export ships ~70 morph
+targets per face mesh, most of them all zeros, and that is the bulk of the
+download. This rewrites the GLB with:
+
+  - morph targets the page never uses, or that move nothing, removed
+  - animations other than the first (the idle clip the page plays) removed
+  - nodes not reachable from the scene, and bones no vertex is weighted to
+    that nothing animates, removed (skins and joint indices remapped)
+  - normals, tangents, texture coordinates, skin weights and morph deltas
+    stored as normalized integers (KHR_mesh_quantization). Base positions
+    stay float: the meshes are skinned, so there is no node transform to
+    carry a dequantization scale, and the page sizes the avatar from them.
+  - textures larger than --max-texture downscaled and re-encoded, if Pillow
+    is installed (pip install Pillow); otherwise they are copied as they are
+
+and prints a size report with the largest error each quantization introduced.
+"""
+import argparse
+import io
+import json
+import struct
+import sys
+
+import numpy as np
+
+from avatar_manifest import BLINK_MORPHS, BONE_KEYWORDS, VISEME_MORPHS
+
+GLB_MAGIC = 0x46546C67
+JSON_CHUNK = 0x4E4F534A
+BIN_CHUNK = 0x004E4942
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+COMPONENT_TYPES = {
+    5120: np.int8, 5121: np.uint8, 5122: np.int16, 5123: np.uint16, 5125: np.uint32, 5126: np.float32,
+}
+COMPONENT_IDS = {np.dtype(dtype): component for component, dtype in COMPONENT_TYPES.items()}
+TYPE_WIDTHS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+ACCESSOR_TYPES = {1: 'SCALAR', 2: 'VEC2', 3: 'VEC3', 4: 'VEC4', 16: 'MAT4'}
+
+
+def read_glb(path):
+    """(glTF JSON, binary chunk) of a .glb file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, length = struct.unpack_from('<III', data)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError(f"{path} is not a binary glTF 2.0 file")
+    gltf, binary = None, b''
+    offset = 12
+    while offset < length:
+        chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == JSON_CHUNK:
+            gltf = json.loads(chunk)
+        elif chunk_type == BIN_CHUNK:
+            binary = chunk
+        offset += 8 + chunk_length
+    return gltf, binary
+
+
+def write_glb(path, gltf, binary):
+    content = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    content += b' ' * (-len(content) % 4)
+    binary += b'\0' * (-len(binary) % 4)
+    length = 12 + 8 + len(content) + (8 + len(binary) if binary else 0)
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<III', GLB_MAGIC, 2, length))
+        f.write(struct.pack('<II', len(content), JSON_CHUNK) + content)
+        if binary:
+            f.write(struct.pack('<II', len(binary), BIN_CHUNK) + binary)
+    return length
+
+
+def read_accessor(gltf, binary, index):
+    """Accessor data as a (count, width) array; normalized integers are
+    returned as floats, the way a renderer sees them"""
+    accessor = gltf['accessors'][index]
+    if 'sparse' in accessor:
+        raise ValueError(f"accessor {index} is sparse, which is not supported")
+    dtype = np.dtype(COMPONENT_TYPES[accessor['componentType']])
+    width = TYPE_WIDTHS[accessor['type']]
+    count = accessor['count']
+    if 'bufferView' not in accessor:
+        values = np.zeros((count, width), dtype)
+    else:
+        view = gltf['bufferViews'][accessor['bufferView']]
+        start = view.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+        stride = view.get('byteStride') or dtype.itemsize * width
+        values = np.ndarray((count, width), dtype, buffer=binary, offset=start,
+                            strides=(stride, dtype.itemsize)).copy()
+    if accessor.get('normalized'):
+        info = np.iinfo(dtype)
+        values = np.maximum(values.astype(np.float32) / info.max, -1.0)
+    return values
+
+
+def quantize(values, dtype):
+    """(normalized integers, largest absolute error) for values in [-1, 1]
+    (or [0, 1] for unsigned types)"""
+    info = np.iinfo(dtype)
+    low = 0 if info.min == 0 else -info.max
+    stored = np.clip(np.round(values * info.max), low, info.max).astype(dtype)
+    error = float(np.abs(stored.astype(np.float32) / info.max - values).max()) if len(values) else 0.0
+    return stored, error
+
+
+def quantize_weights(weights):
+    """Skin weights as normalized bytes that still sum to exactly 1"""
+    stored = np.round(np.clip(weights, 0, 1) * 255).astype(np.int32)
+    heaviest = stored.argmax(axis=1)
+    stored[np.arange(len(stored)), heaviest] += 255 - stored.sum(axis=1)
+    stored = stored.astype(np.uint8)
+    error = float(np.abs(stored.astype(np.float32) / 255 - weights).max()) if len(weights) else 0.0
+    return stored, error
+
+
+class BufferBuilder:
+    """Accumulates the binary chunk, buffer views and accessors of the output"""
+
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+        self.buffer_views = []
+        self.accessors = []
+        self.bytes_by_kind = {}
+
+    def add_view(self, data, kind, target=None, stride=None):
+        padding = -self.length % 4
+        if padding:
+            self.chunks.append(b'\0' * padding)
+            self.length += padding
+        view = {'buffer': 0, 'byteOffset': self.length, 'byteLength': len(data)}
+        if target is not None:
+            view['target'] = target
+        if stride is not None:
+            view['byteStride'] = stride
+        self.chunks.append(data)
+        self.length += len(data)
+        self.bytes_by_kind[kind] = self.bytes_by_kind.get(kind, 0) + len(data)
+        self.buffer_views.append(view)
+        return len(self.buffer_views) - 1
+
+    def add_accessor(self, values, kind, target=None, normalized=False, bounds=False):
+        values = np.ascontiguousarray(values)
+        count, width = values.shape
+        element_size = values.dtype.itemsize * width
+        stride = None
+        data = values.tobytes()
+        if target == ARRAY_BUFFER and element_size % 4:
+            # Vertex attribute elements must start on 4-byte boundaries
+            stride = element_size + (-element_size % 4)
+            padded = np.zeros((count, stride), np.uint8)
+            padded[:, :element_size] = values.view(np.uint8).reshape(count, element_size)
+            data = padded.tobytes()
+        accessor = {
+            'bufferView': self.add_view(data, kind, target, stride),
+            'componentType': COMPONENT_IDS[values.dtype],
+            'count': count,
+            'type': ACCESSOR_TYPES[width],
+        }
+        if normalized:
+            accessor['normalized'] = True
+        if bounds:
+            cast = float if values.dtype.kind == 'f' else int
+            accessor['min'] = [cast(v) for v in values.min(axis=0)] if count else [0] * width
+            accessor['max'] = [cast(v) for v in values.max(axis=0)] if count else [0] * width
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+    def binary(self):
+        return b''.join(self.chunks)
+
+
+def accessor_bytes(gltf, index):
+    accessor = gltf['accessors'][index]
+    if 'bufferView' not in accessor:
+        return 0
+    dtype = np.dtype(COMPONENT_TYPES[accessor['componentType']])
+    return accessor['count'] * dtype.itemsize * TYPE_WIDTHS[accessor['type']]
+
+
+def size_by_kind(gltf):
+    """Bytes of the binary chunk per kind of data, as reported in the table"""
+    sizes = {}
+
+    def count(kind, index):
+        sizes[kind] = sizes.get(kind, 0) + accessor_bytes(gltf, index)
+
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh['primitives']:
+            for index in primitive['attributes'].values():
+                count('vertex attributes', index)
+            if 'indices' in primitive:
+                count('indices', primitive['indices'])
+            for target in primitive.get('targets', []):
+                for index in target.values():
+                    count('morph targets', index)
+    for animation in gltf.get('animations', []):
+        for sampler in animation['samplers']:
+            count('animations', sampler['input'])
+            count('animations', sampler['output'])
+    for skin in gltf.get('skins', []):
+        if 'inverseBindMatrices' in skin:
+            count('skins', skin['inverseBindMatrices'])
+    for image in gltf.get('images', []):
+        if 'bufferView' in image:
+            sizes['textures'] = sizes.get('textures', 0) + gltf['bufferViews'][image['bufferView']]['byteLength']
+    return sizes
+
+
+class AvatarOptimizer:
+    """One optimization run over a parsed GLB; see the module docstring"""
+
+    def __init__(self, gltf, binary, keep_morphs=(), keep_bones=(), animations=1,
+                 max_texture=1024, jpeg_quality=85, quantize=True):
+        self.gltf = gltf
+        self.binary = binary
+        # Morph targets the page drives (the avatar manifest's visemes and blinks)
+        self.keep_morphs = {name.lower() for name in (
+            [n for names in VISEME_MORPHS.values() for n in names] + list(BLINK_MORPHS) + list(keep_morphs))}
+        self.bone_keywords = tuple(BONE_KEYWORDS) + tuple(b.lower() for b in keep_bones)
+        self.animations = gltf.get('animations', [])[:animations]
+        self.max_texture = max_texture
+        self.jpeg_quality = jpeg_quality
+        self.quantize = quantize
+        self.out = BufferBuilder()
+        self.copied = {}  # input accessor -> output accessor, for shared data
+        self.errors = {}  # attribute -> largest quantization error
+        self.notes = []
+        self.uses_quantization = False
+
+    def read(self, index):
+        return read_accessor(self.gltf, self.binary, index)
+
+    def copy_accessor(self, index, kind, target=None):
+        if index not in self.copied:
+            accessor = self.gltf['accessors'][index]
+            values = read_accessor(self.gltf, self.binary, index)
+            if accessor.get('normalized'):
+                values, _ = quantize(values, COMPONENT_TYPES[accessor['componentType']])
+            self.copied[index] = self.out.add_accessor(
+                values, kind, target, normalized=accessor.get('normalized', False), bounds='min' in accessor)
+        return self.copied[index]
+
+    def record_error(self, name, error):
+        self.errors[name] = max(self.errors.get(name, 0.0), error)
+
+    # Nodes and skins
+
+    def reachable_nodes(self):
+        nodes = self.gltf.get('nodes', [])
+        stack = [n for scene in self.gltf.get('scenes', []) for n in scene.get('nodes', [])]
+        seen = set()
+        while stack:
+            index = stack.pop()
+            if index not in seen:
+                seen.add(index)
+                stack.extend(nodes[index].get('children', []))
+        return seen
+
+    def weighted_joints(self):
+        """skin index -> set of joint slots some vertex is weighted to"""
+        used = {}
+        for node in self.gltf.get('nodes', []):
+            if 'skin' not in node or 'mesh' not in node:
+                continue
+            slots = used.setdefault(node['skin'], set())
+            for primitive in self.gltf['meshes'][node['mesh']]['primitives']:
+                attributes = primitive['attributes']
+                for set_index in range(8):
+                    joints, weights = f'JOINTS_{set_index}', f'WEIGHTS_{set_index}'
+                    if joints not in attributes:
+                        break
+                    joint_values = self.read(attributes[joints])
+                    weight_values = self.read(attributes[weights])
+                    slots.update(int(j) for j in np.unique(joint_values[weight_values > 0]))
+        return used
+
+    def kept_nodes(self):
+        """Nodes that draw something, carry weighted or animated bones, or
+        are bones the page looks up, plus all their ancestors"""
+        nodes = self.gltf.get('nodes', [])
+        reachable = self.reachable_nodes()
+        essential = {i for i in reachable if 'mesh' in nodes[i] or 'camera' in nodes[i]}
+        for skin_index, slots in self.weighted_joints().items():
+            joints = self.gltf['skins'][skin_index]['joints']
+            essential.update(joints[slot] for slot in slots if slot < len(joints))
+        for skin in self.gltf.get('skins', []):
+            if 'skeleton' in skin:
+                essential.add(skin['skeleton'])
+        for animation in self.animations:
+            essential.update(c['target']['node'] for c in animation['channels'] if 'node' in c['target'])
+        essential.update(i for i in reachable
+                         if any(k in nodes[i].get('name', '').lower() for k in self.bone_keywords))
+        parents = {child: i for i, node in enumerate(nodes) for child in node.get('children', [])}
+        kept = set()
+        for index in essential & reachable:
+            while index is not None and index not in kept:
+                kept.add(index)
+                index = parents.get(index)
+        return kept
+
+    # Meshes
+
+    def kept_targets(self, mesh):
+        """Indices of the mesh's morph targets worth keeping"""
+        primitives = mesh['primitives']
+        total = len(primitives[0].get('targets', []))
+        names = mesh.get('extras', {}).get('targetNames')
+        kept = []
+        for t in range(total):
+            if names and names[t].lower() not in self.keep_morphs:
+                continue
+            moves = any(np.any(self.read(index) != 0)
+                        for primitive in primitives for index in primitive['targets'][t].values())
+            if moves:
+                kept.append(t)
+        return kept
+
+    def write_attribute(self, name, index, target=False):
+        """Copy one vertex attribute (or morph delta), quantized where that is safe"""
+        kind = 'morph targets' if target else 'vertex attributes'
+        if not self.quantize:
+            return self.copy_accessor(index, kind, ARRAY_BUFFER)
+        label = f"morph target {name}" if target else name
+        accessor = self.gltf['accessors'][index]
+        values = self.read(index)
+        is_float = accessor['componentType'] == 5126
+        if is_float and name in ('NORMAL', 'TANGENT'):
+            stored, error = quantize(values, np.int8)
+            self.record_error(label, error)
+            self.uses_quantization = True
+            return self.out.add_accessor(stored, kind, ARRAY_BUFFER, normalized=True)
+        if is_float and target and name == 'POSITION' and np.abs(values).max(initial=0) <= 1:
+            stored, error = quantize(values, np.int16)
+            self.record_error(label, error)
+            self.uses_quantization = True
+            return self.out.add_accessor(stored, kind, ARRAY_BUFFER, normalized=True, bounds=True)
+        if is_float and name.startswith('TEXCOORD_') and values.min(initial=0) >= 0 and values.max(initial=0) <= 1:
+            stored, error = quantize(values, np.uint16)
+            self.record_error(label, error)
+            return self.out.add_accessor(stored, kind, ARRAY_BUFFER, normalized=True)
+        if is_float and name.startswith('WEIGHTS_'):
+            stored, error = quantize_weights(values)
+            self.record_error(label, error)
+            return self.out.add_accessor(stored, kind, ARRAY_BUFFER, normalized=True)
+        return self.copy_accessor(index, kind, ARRAY_BUFFER)
+
+    def write_primitive(self, primitive, targets, joint_map):
+        out = {k: v for k, v in primitive.items() if k not in ('attributes', 'indices', 'targets')}
+        out['attributes'] = {}
+        for name, index in primitive['attributes'].items():
+            if name.startswith('JOINTS_') and joint_map is not None:
+                joints = self.read(index)
+                joints = joint_map[joints.astype(np.int64)].astype(joints.dtype)
+                out['attributes'][name] = self.out.add_accessor(joints, 'vertex attributes', ARRAY_BUFFER)
+            else:
+                out['attributes'][name] = self.write_attribute(name, index)
+        if 'indices' in primitive:
+            indices = self.read(primitive['indices'])
+            if indices.dtype == np.uint32 and indices.max(initial=0) < 65536:
+                indices = indices.astype(np.uint16)
+            out['indices'] = self.out.add_accessor(indices, 'indices', ELEMENT_ARRAY_BUFFER)
+        if targets:
+            out['targets'] = [{name: self.write_attribute(name, index, target=True)
+                               for name, index in primitive['targets'][t].items()} for t in targets]
+        return out
+
+    def write_mesh(self, mesh, joint_map):
+        targets = self.kept_targets(mesh) if mesh['primitives'][0].get('targets') else []
+        names = mesh.get('extras', {}).get('targetNames')
+        out = {k: v for k, v in mesh.items() if k not in ('primitives', 'weights', 'extras')}
+        out['primitives'] = [self.write_primitive(p, targets, joint_map) for p in mesh['primitives']]
+        if targets and 'weights' in mesh:
+            out['weights'] = [mesh['weights'][t] for t in targets]
+        extras = dict(mesh.get('extras', {}))
+        if names:
+            extras['targetNames'] = [names[t] for t in targets]
+            if not targets:
+                del extras['targetNames']
+        if extras:
+            out['extras'] = extras
+        return out, len(mesh['primitives'][0].get('targets', [])), len(targets)
+
+    # Textures
+
+    def write_image(self, image):
+        out = dict(image)
+        if 'bufferView' not in image:
+            return out
+        view = self.gltf['bufferViews'][image['bufferView']]
+        start = view.get('byteOffset', 0)
+        data = self.binary[start:start + view['byteLength']]
+        data = self.recompress(data, image.get('mimeType'), image.get('name', ''))
+        out['bufferView'] = self.out.add_view(data, 'textures')
+        return out
+
+    def recompress(self, data, mime_type, name):
+        """Smaller encoding of an image, or the original bytes"""
+        try:
+            from PIL import Image
+        except ImportError:
+            if 'Pillow' not in ' '.join(self.notes):
+                self.notes.append("Pillow is not installed: textures copied unchanged (pip install Pillow)")
+            return data
+        picture = Image.open(io.BytesIO(data))
+        if max(picture.size) > self.max_texture:
+            picture.thumbnail((self.max_texture, self.max_texture), Image.LANCZOS)
+        encoded = io.BytesIO()
+        if mime_type == 'image/jpeg':
+            picture.convert('RGB').save(encoded, 'JPEG', quality=self.jpeg_quality, optimize=True, progressive=True)
+        else:
+            picture.save(encoded, 'PNG', optimize=True)
+        if len(encoded.getvalue()) >= len(data):
+            return data
+        self.notes.append(f"texture {name!r}: {len(data)} -> {len(encoded.getvalue())} bytes, {picture.size[0]}x{picture.size[1]}")
+        return encoded.getvalue()
+
+    # Whole file
+
+    def run(self):
+        """Return (optimized glTF JSON, binary chunk, report dict)"""
+        gltf = self.gltf
+        nodes = gltf.get('nodes', [])
+        kept = sorted(self.kept_nodes())
+        node_map = {old: new for new, old in enumerate(kept)}
+
+        # Skins lose the joints that were pruned; vertices are re-pointed
+        skins, joint_maps = [], {}
+        for skin_index, skin in enumerate(gltf.get('skins', [])):
+            slots = [s for s, joint in enumerate(skin['joints']) if joint in node_map]
+            joint_map = np.zeros(max(len(skin['joints']), 1), np.int64)
+            joint_map[slots] = np.arange(len(slots))
+            joint_maps[skin_index] = joint_map
+            out = {k: v for k, v in skin.items() if k not in ('joints', 'inverseBindMatrices', 'skeleton')}
+            out['joints'] = [node_map[skin['joints'][s]] for s in slots]
+            if 'skeleton' in skin:
+                out['skeleton'] = node_map[skin['skeleton']]
+            if 'inverseBindMatrices' in skin:
+                matrices = self.read(skin['inverseBindMatrices'])[slots]
+                out['inverseBindMatrices'] = self.out.add_accessor(matrices, 'skins')
+            skins.append(out)
+
+        # Meshes used by kept nodes; a mesh is written once per skin it is bound with
+        meshes, mesh_map = [], {}
+        morphs_before = morphs_after = 0
+        for old in kept:
+            node = nodes[old]
+            if 'mesh' not in node:
+                continue
+            key = (node['mesh'], node.get('skin'))
+            if key not in mesh_map:
+                mesh, before, after = self.write_mesh(gltf['meshes'][node['mesh']], joint_maps.get(node.get('skin')))
+                morphs_before += before
+                morphs_after += after
+                mesh_map[key] = len(meshes)
+                meshes.append(mesh)
+
+        new_nodes = []
+        for old in kept:
+            node = dict(nodes[old])
+            if 'children' in node:
+                node['children'] = [node_map[c] for c in node['children'] if c in node_map]
+                if not node['children']:
+                    del node['children']
+            if 'mesh' in node:
+                node['mesh'] = mesh_map[(node['mesh'], node.get('skin'))]
+            new_nodes.append(node)
+
+        animations = []
+        for animation in self.animations:
+            channels = [c for c in animation['channels'] if c['target'].get('node') in node_map]
+            samplers, sampler_map = [], {}
+            for channel in channels:
+                if channel['sampler'] not in sampler_map:
+                    sampler = dict(animation['samplers'][channel['sampler']])
+                    sampler['input'] = self.copy_accessor(sampler['input'], 'animations')
+                    sampler['output'] = self.copy_accessor(sampler['output'], 'animations')
+                    sampler_map[channel['sampler']] = len(samplers)
+                    samplers.append(sampler)
+            animations.append(dict(animation, samplers=samplers, channels=[
+                dict(c, sampler=sampler_map[c['sampler']], target=dict(c['target'], node=node_map[c['target']['node']]))
+                for c in channels]))
+
+        images = [self.write_image(image) for image in gltf.get('images', [])]
+
+        result = {k: v for k, v in gltf.items() if k not in (
+            'accessors', 'bufferViews', 'buffers', 'nodes', 'meshes', 'skins', 'animations', 'images')}
+        result['scenes'] = [dict(scene, nodes=[node_map[n] for n in scene.get('nodes', []) if n in node_map])
+                            for scene in gltf.get('scenes', [])]
+        result['nodes'] = new_nodes
+        if meshes:
+            result['meshes'] = meshes
+        if skins:
+            result['skins'] = skins
+        if animations:
+            result['animations'] = animations
+        if images:
+            result['images'] = images
+        if self.uses_quantization:
+            for key in ('extensionsUsed', 'extensionsRequired'):
+                result[key] = sorted(set(result.get(key, [])) | {'KHR_mesh_quantization'})
+        result['accessors'] = self.out.accessors
+        result['bufferViews'] = self.out.buffer_views
+        binary = self.out.binary()
+        result['buffers'] = [{'byteLength': len(binary)}]
+
+        joints_before = sum(len(s['joints']) for s in gltf.get('skins', []))
+        report = {
+            'nodes': (len(nodes), len(new_nodes)),
+            'joints': (joints_before, sum(len(s['joints']) for s in skins)),
+            'morph targets': (morphs_before, morphs_after),
+            'animations': (len(gltf.get('animations', [])), len(animations)),
+            'bytes': {kind: (size, self.out.bytes_by_kind.get(kind, 0))
+                      for kind, size in size_by_kind(gltf).items()},
+            'max error': self.errors,
+            'notes': self.notes,
+        }
+        return result, binary, report
+
+
+def print_report(report, size_before, size_after):
+    print(f"{'':20}{'before':>12}{'after':>12}")
+    for name in ('nodes', 'joints', 'morph targets', 'animations'):
+        before, after = report[name]
+        print(f"{name:20}{before:>12}{after:>12}")
+    for kind, (before, after) in sorted(report['bytes'].items(), key=lambda item: -item[1][0]):
+        print(f"{kind + ' (bytes)':20}{before:>12}{after:>12}")
+    print(f"{'file (bytes)':20}{size_before:>12}{size_after:>12}  ({100 * size_after / size_before:.0f}%)")
+    if report['max error']:
+        print("\nLargest quantization error (model units; normals and weights in [-1, 1]):")
+        for name, error in sorted(report['max error'].items()):
+            print(f"  {name:32}{error:.6f}")
+    for note in report['notes']:
+        print(note)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', nargs='?', default='models/avatar.glb')
+    parser.add_argument('-o', '--output', default='models/avatar.min.glb')
+    parser.add_argument('--keep-morph', action='append', default=[], help='extra morph target to keep (repeatable)')
+    parser.add_argument('--keep-bone', action='append', default=[], help='extra bone name to keep (repeatable)')
+    parser.add_argument('--animations', type=int, default=1, help='how many animations to keep, from the first')
+    parser.add_argument('--max-texture', type=int, default=1024, help='longest texture side in pixels')
+    parser.add_argument('--jpeg-quality', type=int, default=85)
+    parser.add_argument('--no-quantize', action='store_true', help='keep vertex data as 32-bit floats')
+    args = parser.parse_args()
+
+    if args.output == args.input:
+        sys.exit("Write to a new file; the original is the input for the next run")
+    gltf, binary = read_glb(args.input)
+    optimized, optimized_binary, report = AvatarOptimizer(
+        gltf, binary, keep_morphs=args.keep_morph, keep_bones=args.keep_bone, animations=args.animations,
+        max_texture=args.max_texture, jpeg_quality=args.jpeg_quality, quantize=not args.no_quantize,
+    ).run()
+    size_after = write_glb(args.output, optimized, optimized_binary)
+    with open(args.input, 'rb') as f:
+        size_before = len(f.read())
+    print_report(report, size_before, size_after)
+    print(f"\nWrote {args.output}")
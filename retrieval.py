@@ -0,0 +1,138 @@
+"""Section-level retrieval over resume.txt.
+
+The resume is split on its upper-case section headers (EDUCATION:, EXPERIENCE:,
+PUBLICATION:, PROJECT:, ...) and each section is indexed in a small in-memory
+BM25 inverted index, so a question only pulls the sections it is about into
+the Gemini prompt instead of the whole file.
+"""
+import hashlib
+import math
+import re
+from collections import Counter
+
+# "EXPERIENCE: Jr. AI Engineer ..." or a bare "GENERAL AI CONCEPTS" line
+SECTION_HEADER = re.compile(r"^([A-Z][A-Z0-9 &’'/.-]*[A-Z])\s*(?::\s*(.*))?$")
+TOKEN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    'a', 'about', 'all', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'by',
+    'can', 'did', 'do', 'does', 'for', 'from', 'have', 'how', 'i', 'in', 'is',
+    'it', 'me', 'most', 'my', 'of', 'on', 'or', 'tell', 'that', 'the', 'this',
+    'to', 'was', 'we', 'were', 'what', 'when', 'where', 'which', 'who', 'why',
+    'with', 'you', 'your',
+}
+
+# Sections that are always sent, whatever the question
+PINNED_LABELS = {'NAME'}
+
+# Everyday words for what the resume's headers and sections call something else;
+# a question's terms are expanded with these ("where did you study" -> EDUCATION)
+SYNONYMS = {
+    'master': 'msc',
+    'masters': 'msc',
+    'postgraduate': 'msc',
+    'bachelor': 'btech',
+    'undergraduate': 'btech',
+    'degree': 'education',
+    'study': 'education',
+    'studied': 'education',
+    'job': 'experience',
+    'work': 'experience',
+    'worked': 'experience',
+    'paper': 'publication',
+    'research': 'publication',
+    'dissertation': 'thesis',
+}
+
+
+def tokenize(text):
+    """Lower-case word tokens with stopwords removed and plurals folded"""
+    tokens = []
+    for word in TOKEN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def expand_terms(text):
+    """Query terms plus the resume's word for any of them that has a synonym"""
+    terms = set(tokenize(text))
+    return terms | {SYNONYMS[term] for term in terms if term in SYNONYMS}
+
+
+def split_sections(text):
+    """Split the resume into (label, section_text) chunks on its headers"""
+    sections = []
+    label, lines = None, []
+    for line in text.splitlines():
+        match = SECTION_HEADER.match(line.strip())
+        if match:
+            if lines:
+                sections.append((label or 'PREAMBLE', '\n'.join(lines).strip()))
+            label, lines = match.group(1), [line.strip()]
+        elif line.strip() or lines:
+            lines.append(line.rstrip())
+    if lines:
+        sections.append((label or 'PREAMBLE', '\n'.join(lines).strip()))
+    return [(label, body) for label, body in sections if body]
+
+
+class ResumeIndex:
+    """BM25 inverted index over resume sections"""
+
+    def __init__(self, text, k1=1.5, b=0.75, mtime=None):
+        self.text = text
+        self.mtime = mtime
+        self.content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        self.k1 = k1
+        self.b = b
+        self.sections = split_sections(text)
+        self.doc_lengths = []
+        self.postings = {}  # term -> list of (section index, term frequency)
+
+        for doc_id, (label, body) in enumerate(self.sections):
+            counts = Counter(tokenize(body))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+
+        n = len(self.sections)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def score(self, query):
+        """Return {section index: BM25 score} for sections matching the query"""
+        scores = {}
+        for term in expand_terms(query):
+            for doc_id, tf in self.postings.get(term, ()):
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def context_for(self, query, top_k=4, min_score=3.0):
+        """Prompt context for a question: pinned sections, sections whose header
+        the question names, and the top-k BM25 hits.
+
+        Falls back to the whole resume when the question names no header and
+        no section scores min_score, so open questions like "who are you?" and
+        a single incidental word match still get full context.
+        """
+        scores = self.score(query)
+        query_terms = expand_terms(query)
+        named = {i for i, (label, _) in enumerate(self.sections) if query_terms & set(tokenize(label))}
+        if not named and max(scores.values(), default=0.0) < min_score:
+            return self.text
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        # "What are your publications?" asks for every PUBLICATION section
+        chosen = set(ranked) | named
+        chosen.update(i for i, (label, _) in enumerate(self.sections) if label in PINNED_LABELS)
+        # Keep document order so the model sees sections as they appear in the resume
+        return '\n\n'.join(self.sections[i][1] for i in sorted(chosen))
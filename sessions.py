@@ -0,0 +1,331 @@
+"""Bounded store of per-visitor conversation history.
+
+Replaces the module-level dict that kept every (question, answer) pair of
+every session forever. Sessions are kept in least-recently-used order and
+are dropped when idle too long, when there are too many of them, or when
+their combined size passes a byte budget.
+
+Only the last few turns of a session are kept verbatim, within a token
+budget. Turns that fall out of that window are folded one at a time into a
+short rolling summary, so the history sent to Gemini stays the same size
+however long a visitor chats.
+
+SessionStore keeps everything in process memory, which is right for a single
+worker. With several gunicorn workers a follow-up question can land on a
+worker that never saw the first one, so SQLiteSessionStore offers the same
+API on a SQLite database in WAL mode that every worker on the host shares.
+"""
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def turn_size(question, answer):
+    return len(question.encode('utf-8')) + len(answer.encode('utf-8'))
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+class HistoryWindow:
+    """Decides which turns stay verbatim and folds the rest into a summary"""
+
+    def __init__(self, max_turns=6, token_budget=1000, summary_token_budget=300):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+
+    def turn_tokens(self, question, answer):
+        return estimate_tokens(question) + estimate_tokens(answer)
+
+    def over_budget(self, turns, tokens):
+        # The newest turn always stays verbatim, whatever its size
+        return len(turns) > 1 and (len(turns) > self.max_turns or tokens > self.token_budget)
+
+    def fold(self, summary, question, answer):
+        """Add one turn to the summary without re-reading older turns: keep
+        the question and the first sentence of the answer, then drop the
+        oldest summary lines if it has grown past its budget"""
+        first_sentence = SENTENCE_END.split(answer.strip(), maxsplit=1)[0]
+        if len(first_sentence) > 200:
+            first_sentence = first_sentence[:197].rstrip() + '...'
+        lines = summary.splitlines() if summary else []
+        lines.append(f"- Asked: {question.strip()} / Answered: {first_sentence}")
+        while len(lines) > 1 and estimate_tokens('\n'.join(lines)) > self.summary_token_budget:
+            lines.pop(0)
+        return '\n'.join(lines)
+
+    def add_turn(self, summary, turns, tokens, question, answer):
+        """Append a turn to the list in place, folding turns that fall out of
+        the window into the summary; returns (summary, tokens, turns folded)"""
+        turns.append((question, answer))
+        tokens += self.turn_tokens(question, answer)
+        folded = 0
+        while self.over_budget(turns, tokens):
+            q, a = turns.pop(0)
+            tokens -= self.turn_tokens(q, a)
+            summary = self.fold(summary, q, a)
+            folded += 1
+        return summary, tokens, folded
+
+
+def session_size(summary, turns):
+    return sum(turn_size(q, a) for q, a in turns) + len(summary.encode('utf-8'))
+
+
+class SessionStore:
+    """Thread-safe LRU of session_id -> (summary, recent (question, answer) turns)"""
+
+    def __init__(self, max_sessions=1000, idle_ttl=1800, max_bytes=16 * 1024 * 1024, window=None):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.window = window or HistoryWindow()
+        # session_id -> [last_seen, turns, bytes, summary, turn tokens]
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self.summarized_turns = 0
+
+    def snapshot(self, session_id):
+        """(summary, copy of the verbatim turns, oldest first); ('', []) for a new session"""
+        with self._lock:
+            self._expire(time.monotonic())
+            session = self._sessions.get(session_id)
+            if session is None:
+                return '', []
+            session[0] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session[3], list(session[1])
+
+    def append(self, session_id, question, answer):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = [now, [], 0, '', 0]
+            session[0] = now
+            self._sessions.move_to_end(session_id)
+
+            # Fold turns that fall out of the window into the rolling summary
+            session[3], session[4], folded = self.window.add_turn(
+                session[3], session[1], session[4], question, answer)
+            self.summarized_turns += folded
+
+            new_size = session_size(session[3], session[1])
+            self.total_bytes += new_size - session[2]
+            session[2] = new_size
+
+            # Evict least recently used sessions, never the one just written
+            while len(self._sessions) > 1 and (
+                    len(self._sessions) > self.max_sessions or self.total_bytes > self.max_bytes):
+                self._drop(next(iter(self._sessions)))
+                self.evicted_lru += 1
+
+    def _expire(self, now):
+        # Caller holds the lock; the LRU order means idle sessions sit at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session[0] < self.idle_ttl:
+                break
+            self._drop(session_id)
+            self.evicted_idle += 1
+
+    def _drop(self, session_id):
+        session = self._sessions.pop(session_id)
+        self.total_bytes -= session[2]
+
+    def stats(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                'backend': 'memory',
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'evicted_idle': self.evicted_idle,
+                'evicted_lru': self.evicted_lru,
+                'summarized_turns': self.summarized_turns,
+            }
+
+
+class SQLiteSessionStore:
+    """SessionStore on a SQLite database shared by all workers on the host.
+
+    Each session is one row keyed by session_id (a WITHOUT ROWID table, so
+    the lookup is a single primary-key b-tree search) holding the summary
+    and verbatim turns as zlib-compressed JSON. append() reads, extends and
+    writes a session in one BEGIN IMMEDIATE transaction, so two turns of a
+    session, from any thread or worker, never overwrite each other. Reads
+    only bump last_seen, which a background thread commits every
+    flush_interval seconds together with expiry and eviction.
+    """
+
+    def __init__(self, path='.sessions.sqlite3', max_sessions=1000, idle_ttl=1800,
+                 max_bytes=16 * 1024 * 1024, window=None, flush_interval=0.1):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.window = window or HistoryWindow()
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()  # guards _touched and the counters
+        self._db_lock = threading.Lock()  # guards the connection and its transactions
+        self._touched = {}  # session_id -> last_seen, for reads
+        self._appended = False  # since the last flush, which then applies the limits
+        self._db = None
+        self._pid = None
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self.summarized_turns = 0
+        self.flushes = 0
+        atexit.register(self.flush)
+
+    def _connection(self):
+        # Caller holds _db_lock. Opened lazily and again after a fork, so
+        # gunicorn's preloading master never shares a connection or the
+        # flusher thread with its workers
+        if self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, last_seen REAL NOT NULL, "
+                "bytes INTEGER NOT NULL, payload BLOB NOT NULL) WITHOUT ROWID")
+            self._db.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+            self._db.commit()
+            self._pid = os.getpid()
+            threading.Thread(target=self._flush_loop, name='session-flush', daemon=True).start()
+        return self._db
+
+    @staticmethod
+    def _encode(summary, turns):
+        return zlib.compress(json.dumps([summary, turns], separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def _decode(payload):
+        summary, turns = json.loads(zlib.decompress(payload))
+        return summary, [tuple(turn) for turn in turns]
+
+    def _load(self, db, session_id, now):
+        """(summary, turns) from the database, or None; caller holds _db_lock"""
+        row = db.execute(
+            "SELECT payload FROM sessions WHERE session_id = ? AND last_seen >= ?",
+            (session_id, now - self.idle_ttl)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def snapshot(self, session_id):
+        """(summary, copy of the verbatim turns, oldest first); ('', []) for a new session"""
+        now = time.time()
+        with self._db_lock:
+            session = self._load(self._connection(), session_id, now)
+        if session is None:
+            return '', []
+        with self._lock:
+            self._touched[session_id] = now
+        return session
+
+    def append(self, session_id, question, answer):
+        now = time.time()
+        # _db_lock keeps this worker's other threads out of the session meanwhile;
+        # BEGIN IMMEDIATE takes SQLite's write lock before the read, so other
+        # workers wait instead of appending to the same base history
+        with self._db_lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                summary, turns = self._load(db, session_id, now) or ('', [])
+                tokens = sum(self.window.turn_tokens(q, a) for q, a in turns)
+                summary, _, folded = self.window.add_turn(summary, turns, tokens, question, answer)
+                db.execute(
+                    "INSERT INTO sessions (session_id, last_seen, bytes, payload) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (session_id) DO UPDATE SET last_seen = excluded.last_seen, "
+                    "bytes = excluded.bytes, payload = excluded.payload",
+                    (session_id, now, session_size(summary, turns), self._encode(summary, turns)))
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+        with self._lock:
+            self.summarized_turns += folded
+            self._appended = True
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Session flush failed: {e}")
+
+    def flush(self):
+        """Commit buffered read times in one transaction and apply the limits"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            appended, self._appended = self._appended, False
+        if not touched and not appended:
+            return
+        with self._db_lock:
+            db = self._connection()
+            with db:
+                db.executemany(
+                    "UPDATE sessions SET last_seen = MAX(last_seen, ?) WHERE session_id = ?",
+                    [(seen, sid) for sid, seen in touched.items()])
+                expired = db.execute(
+                    "DELETE FROM sessions WHERE last_seen < ?", (time.time() - self.idle_ttl,)).rowcount
+                evicted = self._evict(db)
+            self.flushes += 1
+        with self._lock:
+            self.evicted_idle += max(expired, 0)
+            self.evicted_lru += evicted
+
+    def _evict(self, db):
+        # Drop least recently used sessions, never the newest, until within limits
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM sessions").fetchone()
+        if count <= self.max_sessions and total <= self.max_bytes:
+            return 0
+        victims = []
+        for session_id, size in db.execute("SELECT session_id, bytes FROM sessions ORDER BY last_seen"):
+            if count <= 1 or (count <= self.max_sessions and total <= self.max_bytes):
+                break
+            victims.append((session_id,))
+            count -= 1
+            total -= size
+        db.executemany("DELETE FROM sessions WHERE session_id = ?", victims)
+        return len(victims)
+
+    def stats(self):
+        with self._db_lock:
+            count, total = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM sessions").fetchone()
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'sessions': count,
+                'max_sessions': self.max_sessions,
+                'bytes': total,
+                'max_bytes': self.max_bytes,
+                'pending_touches': len(self._touched),
+                'flushes': self.flushes,
+                # Counted by this worker only
+                'evicted_idle': self.evicted_idle,
+                'evicted_lru': self.evicted_lru,
+                'summarized_turns': self.summarized_turns,
+            }
@@ -0,0 +1,105 @@
+"""Coalescing of identical questions that are being answered at the same time.
+
+When a link to the page is shared, many visitors click the same suggestion
+within seconds. The first request for a cache key becomes the leader and calls
+Gemini; requests for the same key that arrive while it runs (or shortly
+after, while its audio is still being synthesized and the answer is not in
+the cache yet) wait on the leader's Future and reuse its answer. Audio needs
+no coalescing here: AudioStore already shares in-flight synthesis by id.
+
+Results are shared through concurrent.futures.Future, so thread-based Flask
+requests and asyncio requests in the same process can join one flight.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Thread-safe map of key -> Future for computations in progress"""
+
+    def __init__(self, linger=10.0):
+        self.linger = linger
+        self._flights = {}  # key -> [Future, expires_at once finished]
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        self.failures = 0
+
+    def join(self, key):
+        """Return (future, is_leader). The leader must call resolve() with the
+        same key and future once it has a result or an error."""
+        with self._lock:
+            self._prune(time.monotonic())
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.followers += 1
+                return flight[0], False
+            future = Future()
+            self._flights[key] = [future, None]
+            self.leaders += 1
+            return future, True
+
+    def resolve(self, key, future, result=None, error=None):
+        """Hand the leader's result (or exception) to every follower"""
+        if error is not None and not isinstance(error, Exception):
+            # e.g. the leader's client disconnected mid-stream
+            error = RuntimeError(f"The request answering this question was aborted ({type(error).__name__})")
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None or flight[0] is not future:
+                return
+            if error is not None:
+                # Don't keep failures around; the next request tries again
+                del self._flights[key]
+                self.failures += 1
+            else:
+                flight[1] = time.monotonic() + self.linger
+
+    def _prune(self, now):
+        # Caller holds the lock
+        for key in [k for k, (_, expires_at) in self._flights.items()
+                    if expires_at is not None and expires_at <= now]:
+            del self._flights[key]
+
+    def do(self, key, fn, *args):
+        """fn(*args), shared with concurrent callers of the same key;
+        returns (result, whether this call computed it)"""
+        future, leader = self.join(key)
+        if not leader:
+            return future.result(), False
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, result)
+        return result, True
+
+    async def do_async(self, key, fn, *args):
+        """do() for a coroutine function; waits without blocking the event loop"""
+        future, leader = self.join(key)
+        if not leader:
+            return await asyncio.wrap_future(future), False
+        try:
+            result = await fn(*args)
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, result)
+        return result, True
+
+    def stats(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                'in_flight': sum(1 for _, expires_at in self._flights.values() if expires_at is None),
+                'leaders': self.leaders,
+                'coalesced': self.followers,
+                'failures': self.failures,
+            }
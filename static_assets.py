@@ -0,0 +1,215 @@
+"""Long-lived, cache-friendly serving of static files and build output.
+
+Every file gets a fingerprinted URL with a hash of its content,
+avatar.min.3f2a9c0d1b7e4a55.glb, which is served with
+"Cache-Control: public, max-age=31536000, immutable": returning visitors
+never ask for it again, and a new model gets a new URL. Plain names
+still work, but are revalidated on every use (ETag, 304).
+
+Files go out through send_file, which streams them with wsgi.file_wrapper
+(sendfile under gunicorn) and answers conditional and Range requests.
+When the client accepts it, a precompressed .br or .gz copy made by
+precompress() is sent instead, with its own strong ETag.
+
+Only files directly inside the directory whose extension is allowlisted
+are served; nothing else in the app root is reachable.
+
+BuiltAssets does the same for content made at startup (the rendered page
+and its CSS and JS), held in memory together with its compressed forms.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import threading
+
+from flask import Response, abort, send_file
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+FINGERPRINTED = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{16})(?P<ext>\.[A-Za-z0-9]+)$')
+MIMETYPES = {
+    '.glb': 'model/gltf-binary',
+    '.gltf': 'model/gltf+json',
+    '.bin': 'application/octet-stream',
+    '.ktx2': 'image/ktx2',
+}
+# (Accept-Encoding token, file suffix), in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress(data, encoding):
+    return brotli.compress(data) if encoding == 'br' else gzip.compress(data, 9)
+
+
+def available_encodings():
+    return [(encoding, suffix) for encoding, suffix in ENCODINGS if encoding != 'br' or brotli is not None]
+
+
+def preferred_encoding(request, available):
+    """The first encoding in ENCODINGS that is available and the client accepts"""
+    for encoding, _ in ENCODINGS:
+        if encoding in available and request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def set_cache_headers(response, immutable):
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+
+
+class StaticAssets:
+    """Fingerprinted URLs and responses for the files in directory"""
+
+    def __init__(self, directory, url_prefix, extensions):
+        self.directory = os.path.abspath(directory)
+        self.url_prefix = url_prefix.rstrip('/')
+        self.extensions = {e.lower() for e in extensions}
+        self._digests = {}  # name -> (mtime_ns, size, hex digest)
+        self._lock = threading.Lock()
+
+    def path(self, name):
+        """Absolute path of an allowlisted file, or None"""
+        if (not name or '/' in name or '\\' in name or name.startswith('.')
+                or os.path.splitext(name)[1].lower() not in self.extensions):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def digest(self, name):
+        """First 16 hex digits of the file's SHA-256, cached until it changes"""
+        path = self.path(name)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._digests.get(name)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(block)
+            cached = (stat.st_mtime_ns, stat.st_size, sha.hexdigest()[:16])
+            with self._lock:
+                self._digests[name] = cached
+        return cached[2]
+
+    def fingerprinted(self, name):
+        """avatar.glb -> avatar.<digest>.glb"""
+        stem, ext = os.path.splitext(name)
+        return f"{stem}.{self.digest(name)}{ext}"
+
+    def url(self, name):
+        return f"{self.url_prefix}/{self.fingerprinted(name)}"
+
+    def resolve(self, requested):
+        """(file name, whether the request was for its current fingerprint);
+        a stale fingerprint resolves to the current file, uncached"""
+        match = FINGERPRINTED.match(requested)
+        if match and self.path(match['stem'] + match['ext']):
+            name = match['stem'] + match['ext']
+            return name, match['digest'] == self.digest(name)
+        return requested, False
+
+    def precompress(self, name, min_saving=0.1):
+        """Write .gz (and .br with the brotli module) next to the file when
+        missing or older than it and at least min_saving smaller"""
+        path = self.path(name)
+        if path is None:
+            return
+        for encoding, suffix in available_encodings():
+            target = path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                compressed = compress(data, encoding)
+                if len(compressed) > len(data) * (1 - min_saving):
+                    continue
+                # Workers may start at the same time; each writes its own temp file
+                temporary = f"{target}.{os.getpid()}.tmp"
+                with open(temporary, 'wb') as f:
+                    f.write(compressed)
+                shutil.move(temporary, target)
+                print(f"Precompressed {name} ({encoding}): {len(data)} -> {len(compressed)} bytes")
+            except OSError as e:
+                print(f"Could not precompress {name}: {e}")
+
+    def send(self, requested, request):
+        """Response for /<prefix>/<requested>; 404 for anything not allowlisted"""
+        name, immutable = self.resolve(requested)
+        path = self.path(name)
+        if path is None:
+            abort(404)
+        digest = self.digest(name)
+        ext = os.path.splitext(name)[1].lower()
+        mimetype = MIMETYPES.get(ext) or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+        # Precompressed copies count only while they are newer than the file
+        suffixes = {encoding: path + suffix for encoding, suffix in ENCODINGS
+                    if os.path.isfile(path + suffix) and os.path.getmtime(path + suffix) >= os.path.getmtime(path)}
+        encoding = preferred_encoding(request, suffixes)
+        if encoding:
+            path, digest = suffixes[encoding], f"{digest}.{encoding}"
+
+        response = send_file(path, mimetype=mimetype, etag=digest, conditional=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        set_cache_headers(response, immutable)
+        return response
+
+
+class BuiltAssets:
+    """In-memory assets with fingerprinted URLs, served like StaticAssets"""
+
+    def __init__(self, url_prefix):
+        self.url_prefix = url_prefix.rstrip('/')
+        self._assets = {}  # name -> (mimetype, digest, {encoding or None: bytes})
+
+    def add(self, name, content, mimetype):
+        """Store content (str or bytes) and its compressed forms; returns its URL"""
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        variants = {None: data}
+        for encoding, _ in available_encodings():
+            compressed = compress(data, encoding)
+            if len(compressed) < len(data):
+                variants[encoding] = compressed
+        self._assets[name] = (mimetype, hashlib.sha256(data).hexdigest()[:16], variants)
+        return self.url(name)
+
+    def url(self, name):
+        stem, ext = os.path.splitext(name)
+        return f"{self.url_prefix}/{stem}.{self._assets[name][1]}{ext}"
+
+    def sizes(self, name):
+        """Bytes per encoding ('identity' for uncompressed)"""
+        return {encoding or 'identity': len(data) for encoding, data in self._assets[name][2].items()}
+
+    def send(self, requested, request):
+        """Response for requested (a plain or fingerprinted name); 404 if unknown"""
+        match = FINGERPRINTED.match(requested)
+        name = match['stem'] + match['ext'] if match and match['stem'] + match['ext'] in self._assets else requested
+        if name not in self._assets:
+            abort(404)
+        mimetype, digest, variants = self._assets[name]
+        encoding = preferred_encoding(request, variants)
+        response = Response(variants[encoding], mimetype=mimetype)
+        response.set_etag(f"{digest}.{encoding}" if encoding else digest)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        set_cache_headers(response, immutable=bool(match) and match['digest'] == digest)
+        return response.make_conditional(request)
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+def test_async_waiters_queue_without_threads():
+    limit = AdmissionController('test', max_concurrent=1, max_queue=40, max_wait=5)
+    limit.acquire()
+
+    async def wait_for_slot():
+        async with limit.slot_async():
+            pass
+
+    async def main():
+        waiters = [asyncio.create_task(wait_for_slot()) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        assert limit.waiting == 40
+        # Unrelated work on the default executor is not stuck behind the queue
+        started = time.monotonic()
+        await asyncio.get_running_loop().run_in_executor(None, time.sleep, 0)
+        assert time.monotonic() - started < 0.5
+        limit.release()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert sum(isinstance(r, Overloaded) for r in results) == 10
+        assert sum(r is None for r in results) == 40
+
+    asyncio.run(main())
+    assert limit.stats()['active'] == 0
+
+
+def test_freed_slot_goes_to_async_and_thread_waiters():
+    limit = AdmissionController('test', max_concurrent=1, max_queue=8, max_wait=5)
+    limit.acquire()
+    admitted = []
+
+    def thread_waiter():
+        with limit.slot():
+            admitted.append('thread')
+
+    async def main():
+        async def task_waiter():
+            async with limit.slot_async():
+                admitted.append('task')
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(task_waiter())
+        await asyncio.sleep(0.01)
+        thread = threading.Thread(target=thread_waiter)
+        thread.start()
+        await asyncio.sleep(0.01)
+        limit.release()
+        await task
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+
+    asyncio.run(main())
+    assert admitted == ['task', 'thread']
+
+
+def test_async_waiter_times_out_and_cancelled_waiter_leaves_queue():
+    limit = AdmissionController('test', max_concurrent=1, max_queue=8, max_wait=0.05)
+    limit.acquire()
+
+    async def main():
+        with pytest.raises(Overloaded):
+            await limit.acquire_async()
+        cancelled = asyncio.create_task(limit.acquire_async(time.monotonic() + 5))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+    asyncio.run(main())
+    assert limit.waiting == 0
+    limit.release()
+    assert limit.try_acquire()
@@ -0,0 +1,50 @@
+import pytest
+
+from answer_cache import SimilarityIndex
+
+# The warm-up seeds (the page's suggestion phrases)
+SEEDS = [
+    "Tell me about your MSc in AI.",
+    "What AI tools do you use most?",
+    "What are your publications?",
+    "Ask me about my experience",
+    "Ask me about my projects",
+]
+
+
+@pytest.fixture
+def index():
+    index = SimilarityIndex()
+    for seed in SEEDS:
+        index.add(seed, f"answer: {seed}", b'', 'resume')
+    return index
+
+
+@pytest.mark.parametrize('question, seed', [
+    ("tell me about your masters", "Tell me about your MSc in AI."),
+    ("what was your MSc about", "Tell me about your MSc in AI."),
+    ("tell me about your projects", "Ask me about my projects"),
+    ("what projects have you done", "Ask me about my projects"),
+    ("what is your work experience", "Ask me about my experience"),
+    ("tell me about your papers", "What are your publications?"),
+])
+def test_spoken_variants_match_their_seed(index, question, seed):
+    match = index.lookup(question, 'resume')
+    assert match is not None and match[0] == seed
+
+
+@pytest.mark.parametrize('question', [
+    "What AI tools do you not use?",
+    "What AI tools have you never used?",
+    "What programming languages do you know?",
+    "Tell me about your bachelor's",
+    "What was your MSc thesis about?",
+    "Tell me about AI",
+])
+def test_different_questions_do_not_match(index, question):
+    assert index.lookup(question, 'resume') is None
+
+
+def test_new_resume_drops_every_entry(index):
+    assert index.lookup("tell me about your projects", 'edited resume') is None
+    assert index.stats()['entries'] == 0
@@ -0,0 +1,37 @@
+import multiprocessing
+import threading
+
+from sessions import SQLiteSessionStore
+
+
+def append_turns(path, worker, count):
+    store = SQLiteSessionStore(path, flush_interval=60)
+    for i in range(count):
+        store.append('shared', f"q{worker}-{i}", 'a')
+
+
+def test_sqlite_append_keeps_every_turn_from_threads(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.sqlite3'), flush_interval=60)
+    store.window.max_turns = 1000
+    store.window.token_budget = 10 ** 6
+    threads = [threading.Thread(target=lambda w=w: [store.append('shared', f"q{w}-{i}", 'a') for i in range(20)])
+               for w in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.snapshot('shared')[1]) == 8 * 20
+
+
+def test_sqlite_append_keeps_every_turn_from_workers(tmp_path):
+    path = str(tmp_path / 'sessions.sqlite3')
+    SQLiteSessionStore(path).snapshot('shared')  # create the table first
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=append_turns, args=(path, w, 3)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # The default window keeps the newest 6 verbatim and folds the rest into the summary
+    summary, turns = SQLiteSessionStore(path).snapshot('shared')
+    assert len(turns) + len(summary.splitlines()) == 4 * 3
@@ -0,0 +1,201 @@
+"""Text-to-speech engines behind one interface.
+
+Every backend turns one sentence into a self-contained audio clip and knows
+how to join clips into one answer, so the sentence cache, /audio and the
+streaming path don't care which engine produced them:
+
+  gtts    Google Translate's voice over HTTPS (MP3). Natural, but one network
+          round trip per sentence, and it fails when outbound HTTP does.
+  espeak  espeak-ng running on this machine (WAV). Robotic, but offline and
+          a few milliseconds per sentence.
+
+TTS_BACKEND selects one. Each backend keeps latency statistics for /stats.
+"""
+import io
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import deque
+
+from gtts import gTTS
+
+
+class TTSBackend:
+    """Base class: subclasses implement _synthesize(sentence, timeout)"""
+
+    name = None
+    mimetype = 'audio/mpeg'
+    extension = 'mp3'
+
+    def __init__(self, lang='en', voice=None):
+        self.lang = lang
+        self.voice = voice
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=512)  # seconds, most recent calls
+        self.calls = 0
+        self.failures = 0
+
+    @property
+    def cache_voice(self):
+        """Voice component of cache keys and audio ids, unique per engine"""
+        return f"{self.name}:{self.voice}"
+
+    def synthesize(self, sentence, timeout=None):
+        """Audio bytes for one sentence"""
+        started = time.monotonic()
+        try:
+            audio = self._synthesize(sentence, timeout)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        with self._lock:
+            self.calls += 1
+            self._latencies.append(time.monotonic() - started)
+        return audio
+
+    def _synthesize(self, sentence, timeout):
+        raise NotImplementedError
+
+    def join(self, clips):
+        """One clip from several, in order"""
+        return b''.join(clips)
+
+    def duration_ms(self, clip):
+        """Playing time of a clip in milliseconds"""
+        return mp3_duration_ms(clip)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls, failures = self.calls, self.failures
+
+        def percentile(pct):
+            if not latencies:
+                return 0.0
+            return round(1000 * latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))], 1)
+
+        return {
+            'backend': self.name,
+            'voice': self.voice,
+            'calls': calls,
+            'failures': failures,
+            'avg_ms': round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+        }
+
+
+class GTTSBackend(TTSBackend):
+    """gTTS; voice is the Google domain (tld) that sets the accent"""
+
+    name = 'gtts'
+
+    def __init__(self, lang='en', voice='com'):
+        super().__init__(lang, voice)
+
+    @property
+    def cache_voice(self):
+        # Unprefixed, so audio cached before there were backends stays valid
+        return self.voice
+
+    def _synthesize(self, sentence, timeout):
+        tts = gTTS(text=sentence, lang=self.lang, tld=self.voice, slow=False, timeout=timeout)
+        fp = io.BytesIO()
+        tts.write_to_fp(fp)
+        return fp.getvalue()
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng (or espeak) as a subprocess; voice is an espeak voice name"""
+
+    name = 'espeak'
+    mimetype = 'audio/wav'
+    extension = 'wav'
+
+    def __init__(self, lang='en', voice=None, words_per_minute=165, binary=None):
+        super().__init__(lang, voice or lang)
+        self.words_per_minute = words_per_minute
+        self.binary = binary or shutil.which('espeak-ng') or shutil.which('espeak')
+        if self.binary is None:
+            raise RuntimeError("TTS_BACKEND=espeak needs espeak-ng (or espeak) installed")
+
+    def _synthesize(self, sentence, timeout):
+        # Text goes in on stdin, so a sentence starting with '-' is not an option
+        result = subprocess.run(
+            [self.binary, '--stdout', '--stdin', '-v', self.voice, '-s', str(self.words_per_minute)],
+            input=sentence.encode('utf-8'), capture_output=True, timeout=timeout, check=True)
+        # espeak streams its WAV with a placeholder length; rewrite the header
+        return self.join([result.stdout])
+
+    def join(self, clips):
+        params, frames = None, []
+        for clip in clips:
+            with wave.open(io.BytesIO(clip)) as reader:
+                params = params or reader.getparams()
+                frames.append(reader.readframes(reader.getnframes()))
+        out = io.BytesIO()
+        with wave.open(out, 'wb') as writer:
+            writer.setnchannels(params.nchannels)
+            writer.setsampwidth(params.sampwidth)
+            writer.setframerate(params.framerate)
+            writer.writeframes(b''.join(frames))
+        return out.getvalue()
+
+    def duration_ms(self, clip):
+        with wave.open(io.BytesIO(clip)) as reader:
+            return 1000 * reader.getnframes() / reader.getframerate()
+
+
+# MPEG audio frame headers: bitrates (kbit/s) for layer III by MPEG-1 vs 2/2.5,
+# and sample rates by version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def mp3_duration_ms(clip):
+    """Playing time of layer III MP3 data, by walking its frame headers.
+
+    gTTS answers are several MP3 files concatenated, so this counts frames
+    rather than trusting the first header or a Xing/ID3 length.
+    """
+    seconds = 0.0
+    pos = 0
+    while pos + 4 <= len(clip):
+        if clip[pos:pos + 3] == b'ID3' and pos + 10 <= len(clip):
+            # ID3v2 tag: 10-byte header, then a syncsafe size
+            size = ((clip[pos + 6] & 0x7f) << 21 | (clip[pos + 7] & 0x7f) << 14
+                    | (clip[pos + 8] & 0x7f) << 7 | (clip[pos + 9] & 0x7f))
+            pos += 10 + size
+            continue
+        b1, b2 = clip[pos + 1], clip[pos + 2]
+        version = (b1 >> 3) & 0x3
+        if (clip[pos] != 0xff or b1 & 0xe0 != 0xe0 or version == 1
+                or (b1 >> 1) & 0x3 != 1 or not 0 < b2 >> 4 < 15 or (b2 >> 2) & 0x3 == 3):
+            pos += 1  # not a layer III frame header; resync
+            continue
+        bitrate = 1000 * MP3_BITRATES[1 if version == 3 else 2][b2 >> 4]
+        sample_rate = MP3_SAMPLE_RATES[version][(b2 >> 2) & 0x3]
+        per_frame = 1152 if version == 3 else 576
+        pos += per_frame // 8 * bitrate // sample_rate + ((b2 >> 1) & 0x1)
+        seconds += per_frame / sample_rate
+    return 1000 * seconds
+
+
+TTS_BACKENDS = {
+    'gtts': GTTSBackend,
+    'espeak': EspeakBackend,
+}
+
+
+def make_backend(name, lang='en', voice=None):
+    if name not in TTS_BACKENDS:
+        raise RuntimeError(f"TTS_BACKEND must be one of {', '.join(TTS_BACKENDS)}, not {name!r}")
+    if voice is None:
+        return TTS_BACKENDS[name](lang)
+    return TTS_BACKENDS[name](lang, voice)
@@ -0,0 +1,159 @@
+"""Persistent, content-addressed cache of synthesized speech.
+
+Answers are split into sentences and each sentence's audio is stored on disk
+under sha256(text, lang, voice). Whole sentences repeat a lot (the refusal
+line, greetings, the same facts phrased the same way), so only sentences that
+have never been spoken go to the synthesizer. MP3 frames are self-contained,
+so cached MP3 segments are simply concatenated; other formats pass a join.
+The cache lives on disk and survives restarts; the least recently used files
+are removed once it grows past its size limit.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text):
+    """Split text into sentences, keeping the closing punctuation"""
+    return [s.strip() for s in SENTENCE_END.split(text) if s.strip()]
+
+
+class SentenceBuffer:
+    """Collects streamed text and hands back sentences as soon as they end.
+
+    Produces the same sentences as split_sentences() on the full text, so
+    segments synthesized while streaming share cache entries with the rest.
+    """
+
+    def __init__(self):
+        self._pending = ''
+
+    def feed(self, delta):
+        """Add a text delta; return the sentences it completed"""
+        self._pending += delta
+        ends = list(SENTENCE_END.finditer(self._pending))
+        if not ends:
+            return []
+        cut = ends[-1].end()
+        complete, self._pending = self._pending[:cut], self._pending[cut:]
+        return split_sentences(complete)
+
+    def flush(self):
+        """Return whatever is left once the stream has finished"""
+        rest, self._pending = self._pending, ''
+        return split_sentences(rest)
+
+
+class TTSDiskCache:
+    """Directory of <sha256>.<extension> files with size-based LRU eviction"""
+
+    def __init__(self, directory='.tts_cache', max_bytes=100 * 1024 * 1024, extension='mp3'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self._files())
+
+    @staticmethod
+    def key(text, lang='en', voice='com'):
+        raw = f"{lang}\0{voice}\0{text}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.{self.extension}")
+
+    def _files(self):
+        """(path, size, last access) for every cached segment"""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(f".{self.extension}"):
+                stat = entry.stat()
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def contains(self, key):
+        """True if the segment is cached; doesn't count as a hit or refresh it"""
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # mtime doubles as the last-access time for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        # Write to a temp file and rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        try:
+            previous = os.path.getsize(path)
+        except OSError:
+            previous = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.total_bytes += len(data) - previous
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Caller holds the lock; drop oldest segments down to 90% of the limit
+        target = int(self.max_bytes * 0.9)
+        for path, size, _ in sorted(self._files(), key=lambda f: f[2]):
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def synthesize_one(self, sentence, synthesize_sentence, lang='en', voice='com'):
+        """Audio bytes for a single sentence, from the cache when possible"""
+        key = self.key(sentence, lang, voice)
+        audio = self.get(key)
+        if audio is None:
+            audio = synthesize_sentence(sentence)
+            self.put(key, audio)
+        return audio
+
+    def synthesize(self, text, synthesize_sentence, lang='en', voice='com', join=b''.join):
+        """Audio for text, calling synthesize_sentence(sentence) only for
+        sentences that are not cached yet; join() combines the sentences"""
+        return join([
+            self.synthesize_one(sentence, synthesize_sentence, lang, voice)
+            for sentence in split_sentences(text)
+        ])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,172 @@
+"""Third-party browser libraries, kept in vendor/ and served as one bundle.
+
+    python vendor_bundle.py --pin      # download, and record their SHA-256 in vendor/SHA256SUMS
+    python vendor_bundle.py            # download missing files, accepting only the pinned bytes
+
+The page needs three.js r128, its GLTFLoader and wawa-lipsync 1.0.2.
+Loading them from cdnjs, jsdelivr and unpkg costs a DNS lookup and a TLS
+handshake per origin, and one slow or blocked CDN leaves the page waiting
+on its lip-sync polling loop. Instead the files live in vendor/ and at
+startup the server joins them, in order, into one /assets/vendor.<hash>.js
+that is cached for good like the page's own CSS and JS.
+
+Only bytes whose SHA-256 matches vendor/SHA256SUMS (sha256sum -c format)
+are downloaded or bundled, so a CDN serving something else cannot become
+a first-party script cached for a year. --pin is for a developer: it
+trusts what the CDN serves today, and the lock file it writes is reviewed
+and committed. The files are the ones published to npm, which every
+mirror serves byte for byte; rjsmin, when installed, minifies them.
+
+When a file is not pinned, cannot be had or does not match, this prints
+why and exits 1, so a build without a reviewed vendor/SHA256SUMS fails
+instead of silently shipping a page that loads the libraries from the
+CDNs. (The server itself still falls back to the CDNs, for development.)
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import urllib.request
+
+try:
+    import rjsmin
+except ImportError:  # optional: bundle unminified
+    rjsmin = None
+
+LOCK_FILE = 'SHA256SUMS'
+# (file name in vendor/, URLs serving the same npm file), in the order the page loads them
+VENDOR_SCRIPTS = (
+    ('three.min.js', (
+        'https://cdn.jsdelivr.net/npm/three@0.128.0/build/three.min.js',
+        'https://unpkg.com/three@0.128.0/build/three.min.js',
+    )),
+    ('GLTFLoader.js', (
+        'https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/loaders/GLTFLoader.js',
+        'https://unpkg.com/three@0.128.0/examples/js/loaders/GLTFLoader.js',
+    )),
+    ('wawa-lipsync.umd.js', (
+        'https://cdn.jsdelivr.net/npm/wawa-lipsync@1.0.2/dist/index.umd.js',
+        'https://unpkg.com/wawa-lipsync@1.0.2/dist/index.umd.js',
+    )),
+)
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_lock(directory):
+    """{file name: pinned hex digest} from directory/SHA256SUMS"""
+    pins = {}
+    try:
+        with open(os.path.join(directory, LOCK_FILE), encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    digest, name = line.split(None, 1)
+                    pins[name.strip().lstrip('*')] = digest.lower()
+    except OSError:
+        pass
+    return pins
+
+
+def write_lock(directory, pins):
+    with open(os.path.join(directory, LOCK_FILE), 'w', encoding='utf-8') as f:
+        for name, _ in VENDOR_SCRIPTS:
+            if name in pins:
+                f.write(f"{pins[name]}  {name}\n")
+
+
+def problems(directory):
+    """Why directory can't be bundled, one line per file; empty when it can"""
+    pins = read_lock(directory)
+    found = []
+    for name, _ in VENDOR_SCRIPTS:
+        path = os.path.join(directory, name)
+        if name not in pins:
+            found.append(f"{name} is not pinned in {LOCK_FILE}")
+        elif not os.path.isfile(path):
+            found.append(f"{name} is missing")
+        else:
+            with open(path, 'rb') as f:
+                if sha256(f.read()) != pins[name]:
+                    found.append(f"{name} does not match its pinned SHA-256")
+    return found
+
+
+def build_bundle(directory):
+    """The pinned vendor scripts joined in load order, or None unless all are there"""
+    if problems(directory):
+        return None
+    parts = []
+    for name, _ in VENDOR_SCRIPTS:
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            # A source map comment would apply to the whole bundle; drop it
+            script = '\n'.join(line for line in f.read().splitlines()
+                               if not line.startswith('//# sourceMappingURL='))
+        if rjsmin is not None and not name.endswith('.min.js'):
+            script = rjsmin.jsmin(script, keep_bang_comments=True)
+        # The leading ';' ends a previous file that stops without one
+        parts.append(f"/* {name} */\n;" + script)
+    return '\n'.join(parts) + '\n'
+
+
+def download(urls, timeout):
+    """(bytes, url) from the first URL that answers, or (None, None)"""
+    for url in urls:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return response.read(), url
+        except OSError as e:
+            print(f"Could not fetch {url}: {e}")
+    return None, None
+
+
+def fetch(directory, pin=False, force=False, timeout=30):
+    """Download the vendor scripts into directory, writing only pinned bytes
+    (with pin, pinning what is downloaded); returns problems() afterwards"""
+    os.makedirs(directory, exist_ok=True)
+    pins = read_lock(directory)
+    for name, urls in VENDOR_SCRIPTS:
+        path = os.path.join(directory, name)
+        if not force and name in pins and os.path.isfile(path):
+            with open(path, 'rb') as f:
+                if sha256(f.read()) == pins[name]:
+                    continue
+        if not pin and name not in pins:
+            continue  # nothing to check it against; reported below
+        data, url = download(urls, timeout)
+        if data is None:
+            continue
+        digest = sha256(data)
+        if pin:
+            pins[name] = digest
+        elif digest != pins[name]:
+            print(f"Rejected {name} from {url}: SHA-256 {digest}, pinned {pins[name]}")
+            continue
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        shutil.move(temporary, path)
+        print(f"Fetched {name} from {url}: {len(data)} bytes, sha256 {digest}")
+    if pin:
+        write_lock(directory, pins)
+    return problems(directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', nargs='?', default='vendor')
+    parser.add_argument('--pin', action='store_true',
+                        help=f'trust what is downloaded and record it in {LOCK_FILE}; review and commit the result')
+    parser.add_argument('--force', action='store_true', help='download files that are already there')
+    args = parser.parse_args()
+
+    found = fetch(args.directory, pin=args.pin, force=args.force)
+    for problem in found:
+        print(f"Error: {problem}")
+    if found:
+        print(f"Run python {sys.argv[0]} --pin where the CDNs are reachable, "
+              f"then review and commit {args.directory}/")
+        sys.exit(1)
+    print(f"{args.directory}/ has every vendor script, as pinned")
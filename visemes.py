@@ -0,0 +1,154 @@
+"""Viseme timelines computed from answer text.
+
+Instead of analysing audio in the browser every frame, the server sends a
+compact track of [time_ms, viseme] pairs with each piece of answer audio;
+the page just looks up the entry for the current playback time. Visemes use
+the keys of the page's visemeMapping ('sil', 'A', 'B', ...).
+
+The track comes from spelling rules rather than a phoneme dictionary: each
+grapheme (or common digraph) maps to a viseme and a relative duration, and
+the durations are scaled to the audio's length. When the audio is not
+synthesized yet, its length is estimated from a speaking rate learned from
+earlier clips, and the page rescales the track to the real duration once
+the audio has loaded.
+"""
+import re
+import threading
+
+# Relative durations
+VOWEL = 1.0
+LONG_VOWEL = 1.3
+CONSONANT = 0.6
+COMMA_PAUSE = 2.0
+SENTENCE_PAUSE = 3.0
+
+# Longest match first; None means the letters make no visible mouth shape
+DIGRAPHS = {
+    'tch': [('C', CONSONANT)],
+    'th': [('T', CONSONANT)],
+    'sh': [('C', CONSONANT)],
+    'ch': [('C', CONSONANT)],
+    'ph': [('F', CONSONANT)],
+    'wh': [('U', CONSONANT)],
+    'gh': None,
+    'ng': [('G', CONSONANT)],
+    'ck': [('G', CONSONANT)],
+    'qu': [('G', CONSONANT), ('U', CONSONANT)],
+    'oo': [('U', LONG_VOWEL)],
+    'ou': [('O', LONG_VOWEL)],
+    'ow': [('O', LONG_VOWEL)],
+    'oa': [('O', LONG_VOWEL)],
+    'oi': [('O', VOWEL), ('H', VOWEL)],
+    'oy': [('O', VOWEL), ('H', VOWEL)],
+    'au': [('O', LONG_VOWEL)],
+    'aw': [('O', LONG_VOWEL)],
+    'ee': [('E', LONG_VOWEL)],
+    'ea': [('E', LONG_VOWEL)],
+    'ei': [('E', LONG_VOWEL)],
+    'ie': [('H', LONG_VOWEL)],
+    'ai': [('A', LONG_VOWEL)],
+    'ay': [('E', LONG_VOWEL)],
+}
+LETTERS = {
+    'a': 'A', 'e': 'E', 'i': 'H', 'o': 'O', 'u': 'U', 'y': 'H',
+    'b': 'B', 'm': 'B', 'p': 'P',
+    'f': 'F', 'v': 'F',
+    'd': 'D', 't': 'D', 'n': 'D', 'l': 'D',
+    'g': 'G', 'k': 'G', 'q': 'G',
+    's': 'S', 'z': 'S',
+    'r': 'R', 'w': 'U', 'j': 'C',
+}
+VOWELS = set('aeiouy')
+# A digit is spoken as a short word; approximate it as consonant-vowel-consonant
+DIGIT = [('D', CONSONANT), ('A', VOWEL), ('D', CONSONANT)]
+
+TOKEN = re.compile(r"[a-z]+|\d|[,;:]|[.!?]+")
+
+
+def word_visemes(word):
+    """(viseme, relative duration) pairs for one lower-case word"""
+    if len(word) > 2 and word.endswith('e') and word[-2] not in VOWELS:
+        word = word[:-1]  # silent final e, as in "made", "code"
+    shapes = []
+    i = 0
+    while i < len(word):
+        for size in (3, 2):
+            chunk = word[i:i + size]
+            if len(chunk) == size and chunk in DIGRAPHS:
+                shapes.extend(DIGRAPHS[chunk] or [])
+                i += size
+                break
+        else:
+            letter = word[i]
+            if letter == 'c':
+                viseme = 'S' if word[i + 1:i + 2] in ('e', 'i', 'y') else 'G'
+                shapes.append((viseme, CONSONANT))
+            elif letter == 'x':
+                shapes.extend([('G', CONSONANT), ('S', CONSONANT)])
+            elif letter in LETTERS and not (i and word[i - 1] == letter):
+                shapes.append((LETTERS[letter], VOWEL if letter in VOWELS else CONSONANT))
+            i += 1
+    return shapes
+
+
+def text_visemes(text):
+    """(viseme, relative duration) pairs for a whole text, pauses included"""
+    shapes = []
+    for token in TOKEN.findall(text.lower()):
+        if token[0] in '.!?':
+            shapes.append(('sil', SENTENCE_PAUSE))
+        elif token in (',', ';', ':'):
+            shapes.append(('sil', COMMA_PAUSE))
+        elif token.isdigit():
+            shapes.extend(DIGIT)
+        else:
+            shapes.extend(word_visemes(token))
+    return shapes
+
+
+def timeline(text, duration_ms):
+    """{'duration_ms', 'track': [[time_ms, viseme], ...]} spread over duration_ms.
+
+    Consecutive repeats are merged and the track ends on 'sil' at
+    duration_ms, so the mouth closes when the audio does.
+    """
+    shapes = text_visemes(text)
+    total = sum(units for _, units in shapes)
+    track = []
+    if total:
+        scale = duration_ms / total
+        elapsed = 0.0
+        for viseme, units in shapes:
+            if not track or track[-1][1] != viseme:
+                track.append([round(elapsed), viseme])
+            elapsed += units * scale
+    if not track or track[-1][1] != 'sil':
+        track.append([round(duration_ms), 'sil'])
+    return {'duration_ms': round(duration_ms), 'track': track}
+
+
+class SpeechRate:
+    """Milliseconds of audio per unit of relative viseme duration, learned
+    from synthesized clips, for estimating the length of audio not made yet"""
+
+    def __init__(self, ms_per_unit=70.0):
+        self.ms_per_unit = ms_per_unit
+        self._lock = threading.Lock()
+        self.observations = 0
+
+    def estimate_ms(self, text):
+        units = sum(units for _, units in text_visemes(text))
+        with self._lock:
+            return units * self.ms_per_unit
+
+    def observe(self, text, duration_ms):
+        units = sum(units for _, units in text_visemes(text))
+        if units <= 0 or duration_ms <= 0:
+            return
+        with self._lock:
+            self.ms_per_unit = 0.9 * self.ms_per_unit + 0.1 * (duration_ms / units)
+            self.observations += 1
+
+    def stats(self):
+        with self._lock:
+            return {'ms_per_unit': round(self.ms_per_unit, 1), 'observations': self.observations}